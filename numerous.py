@@ -28,25 +28,39 @@
 #      NumerousMetric -- individual metrics
 #
 # PYTHON3:
-# This code is written and maintained for python3.
+# This code is written and maintained for python3, and needs 3.7 or later
+# (contextvars, used for deadline() and priority(), and asyncio for
+# AsyncNumerous).
 #
 # PYTHON2:
-# I backported to python2 (only needed two minor hacks); it works.
-# I primarily develop/maintain this code using python3 but I do keep
-# running my test script against python2 as well.
+# Earlier versions were backported to python2; that no longer works.
 #
 # #################
 
 import json
+import base64           # basic auth header for AsyncNumerous
 import sys              # for version in user-agent and sys.stdin creds helper
 import os               # for getting environment in creds helper
 import requests         # (cheerleading: wow this made the HTTP code simple)
+import urllib3          # (which requests is built on) NumerousUrllib3Transport
 import logging          # needed for debug output
 import time
 import re               # for metricByLabel regex handling
+import threading        # a Numerous can be shared by multiple threads
+import concurrent.futures   # thread pool for readMany
+import queue            # chunk prefetching in the collections iterator
+import random           # jitter for the 429 backoff
+import contextlib       # for Numerous.deadline()
+import contextvars      # ... which is per-thread (and per-asyncio-task)
 
 # used for the statistics counters
 from collections import defaultdict
+# the collections iterator buffers chunks in one of these
+from collections import deque
+# LRU ordering for the shared metric cache
+from collections import OrderedDict
+# response times, the way requests has them
+from datetime import timedelta
 
 # --- - --- - --- only needed to enable HTTP debugging output
 try:
@@ -56,8 +70,54 @@ except ImportError:
   from http.client import HTTPConnection
 # --- - --- - ---
 
+# --- - --- - --- only needed for NumerousSharedRateLimiter
+try:
+    import fcntl
+    import mmap
+    import struct
+    import hashlib
+    import tempfile
+    import stat
+except ImportError:
+    fcntl = None
+# --- - --- - ---
+
+# --- - --- - --- only needed for NumerousEventStore
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+# --- - --- - ---
+
+# --- - --- - --- only needed for eventsArray
+try:
+    import numpy
+except ImportError:
+    numpy = None
+# --- - --- - ---
+
+# --- - --- - --- only needed for AsyncNumerous/AsyncNumerousMetric
+try:
+    import asyncio
+    import aiohttp
+except ImportError:
+    aiohttp = None
+# --- - --- - ---
+
 _NumerousClassVersionString = "20151020-1.6.4++dev"
 
+# the time.time() everything has to be done by; see Numerous.deadline()
+_numerousDeadline = contextvars.ContextVar('_numerousDeadline', default=None)
+
+# the priority of the calls being made; see Numerous.priority()
+_numerousPriority = contextvars.ContextVar('_numerousPriority',
+                                           default='normal')
+
+# set (to a one-element list) while a _fanOut item runs, so the throttle
+# delays can tell the NumerousAdaptiveConcurrency that they happened
+_numerousThrottled = contextvars.ContextVar('_numerousThrottled',
+                                            default=None)
+
 #
 # metric object
 #
@@ -273,13 +333,37 @@ class NumerousMetric:
         # str-fication is belt/suspenders in case (e.g.) was an int in a dict
         self.id = str(actualId)
         self.nr = numerous
-        self.__cachedState = None
+        self.__localState = None      # see __cachedState
+
+
+    # The cached metric attributes (from the last read, update, etc).
+    #
+    # Normally every NumerousMetric object has its own cache. If the Numerous
+    # was made with a cacheTTL then all the NumerousMetric objects for a given
+    # ID share one entry in the Numerous metric cache instead (and the entry
+    # goes away after cacheTTL seconds). Either way, just use this and it
+    # does the right thing; setting it to None invalidates it.
+    def __getCachedState(self):
+        mc = self.nr._metricCache
+        return self.__localState if mc is None else mc.get(self.id)
+
+    def __setCachedState(self, v):
+        mc = self.nr._metricCache
+        if mc is None:
+            self.__localState = v
+        elif v is None:
+            mc.invalidate(self.id)
+        else:
+            mc.put(self.id, v)
 
+    __cachedState = property(__getCachedState, __setCachedState)
 
-    # ensure that the metric attribute cache exists
+    # ensure that the metric attribute cache exists, and return it
     def __ensureCache(self):
-        if not self.__cachedState:
-            ignored = self.read()  # read() to force cachedState into being
+        v = self.__cachedState
+        if not v:
+            v = self.read(dictionary=True)  # read() forces cachedState
+        return v
 
 
     # ===================================
@@ -323,6 +407,11 @@ class NumerousMetric:
     # x will have the old/stale value at this point. So don't access a single
     # metric via multiple objects, or always use read() if you must.
     #
+    # UNLESS: you made the Numerous with a cacheTTL. In that case m1 and m2
+    # share the same cached state (see __cachedState) and x will be x+1.
+    # The cache entries expire after cacheTTL seconds so then you also get
+    # a limit on how stale (as far as other writers go) a value can be.
+    #
     # No __setitem__ is implemented. That seemed fraught with peril though the
     # mapping from __setitem__ into write() and update() calls is quite
     # obvious. [ or the mapping to "update a local cache copy and
@@ -333,25 +422,21 @@ class NumerousMetric:
     # is no cache.
     #
     def __getitem__(self, key):
-        self.__ensureCache()
-        return self.__cachedState[key]
+        return self.__ensureCache()[key]
 
     # Allow things like: if 'photoURL' in m
     def __contains__(self, key):
-        self.__ensureCache()
-        return key in self.__cachedState
+        return key in self.__ensureCache()
 
     # Allow things like: for key in m
     def __iter__(self):
-        self.__ensureCache()
-        return self.__cachedState.__iter__()
+        return self.__ensureCache().__iter__()
 
     # printable/human representation of a metric
     def __str__(self):
         rslt = "<{} @ {}: ".format(self.__class__.__name__, hex(id(self)))
         try:
-            self.__ensureCache()
-            v = self.__cachedState      # just for brevity
+            v = self.__ensureCache()
             rslt += "'{0[label]}' [{0[id]}] = {0[value]}".format(v)
         except NumerousNetworkError:
             rslt += "**NETWORK-ERROR** Could not contact server"
@@ -375,8 +460,8 @@ class NumerousMetric:
     # Return the naked numeric value or the full dict (dictionary=True)
     def read(self, dictionary=False):
         api = self.__getAPI('metric', 'GET')
-        self.__cachedState = self.nr._simpleAPI(api)
-        v = self.__cachedState
+        v = self.nr._simpleAPI(api)
+        self.__cachedState = v
         return v.copy() if dictionary else v['value']
 
     # "Validate" a metric object.
@@ -403,25 +488,68 @@ class NumerousMetric:
         return False  # never happens
 
     # common code for the events/stream/interactions collections iterators
-    def __collections(self, what):
+    #
+    # All of these take an optional prefetch argument; if given the iterator
+    # fetches up to that many chunks ahead of you in a background thread.
+    # They also take an optional limit on the number of items returned;
+    # no chunks beyond the limit will be requested from the server.
+    # See _Numerous_ChunkedAPIIter.
+    def __collections(self, what, prefetch=0, limit=None, **kw):
         api = self.__getAPI(what, 'GET')
-        return _Numerous_ChunkedAPIIter(self.nr, api)
+        return _Numerous_ChunkedAPIIter(self.nr, api,
+                                        prefetch=prefetch, limit=limit, **kw)
 
     # iterator -- typical usage: for event in metric.events():
-    def events(self):
-        return self.__collections('events')
+    #
+    # since/until limit it to the events with since <= updated < until,
+    # given the same way as the before argument of event(). There's no
+    # way to ask the server to start a collection at a given time so the
+    # events newer than until still have to be read (and are skipped),
+    # but it stops as soon as it gets to one older than since.
+    def events(self, prefetch=0, limit=None, since=None, until=None):
+        return self.__collections('events', prefetch, limit,
+                                  **self._eventsRange(since, until))
+
+    # The events as numpy arrays (requires numpy), oldest first. Returns a
+    # dictionary of one array for each of the columns asked for:
+    #     'updated'  : float64, seconds since the epoch (like time.time())
+    #     'value'    : float64
+    #     'id'       : uint64 (the IDs are strings of digits)
+    #     'authorId' : uint64 (0 if there isn't one)
+    # The other arguments are the same as for events(). The events are
+    # converted as they arrive, so there's never more than a batch of the
+    # dictionaries in memory (see _NumerousEventColumns).
+    def eventsArray(self, columns=('updated', 'value'), since=None,
+                    until=None, limit=None, prefetch=0):
+        cols = _NumerousEventColumns(columns)
+        for ev in self.events(prefetch=prefetch, limit=limit,
+                              since=since, until=until):
+            cols.add(ev)
+        return cols.result()
+
+    # the events as a NumerousSeries (requires numpy)
+    def series(self, since=None, until=None, prefetch=0):
+        a = self.eventsArray(since=since, until=until, prefetch=prefetch)
+        return NumerousSeries(a['updated'], a['value'])
+
+    # the since/until (and probe) arguments for the collections iterator
+    def _eventsRange(self, since, until):
+        kw = { 'since' : since, 'until' : until }
+        if until is not None:
+            kw['probe'] = lambda: self.event(before=until)
+        return kw
 
     # iterator
-    def stream(self):
-        return self.__collections('stream')
+    def stream(self, prefetch=0, limit=None):
+        return self.__collections('stream', prefetch, limit)
 
     # iterator
-    def interactions(self):
-        return self.__collections('interactions')
+    def interactions(self, prefetch=0, limit=None):
+        return self.__collections('interactions', prefetch, limit)
 
     # iterator - the entire collection of permissions for this metric
-    def permissions(self):
-        return self.__collections('permissions-collection')
+    def permissions(self, prefetch=0, limit=None):
+        return self.__collections('permissions-collection', prefetch, limit)
 
     # an individual permission for the given userId
     def get_permission(self, userId=None):
@@ -443,8 +571,8 @@ class NumerousMetric:
 
     # NOTE: This will be subscriptions for THIS metric
     #       See also Numerous.subscriptions which will operate by USER
-    def subscriptions(self):
-        return self.__collections('subscriptions')
+    def subscriptions(self, prefetch=0, limit=None):
+        return self.__collections('subscriptions', prefetch, limit)
 
     # This is an individual subscription -- namely, yours.
     # normal users can never see anything other than their own
@@ -502,6 +630,20 @@ class NumerousMetric:
     #               to manually massage it to conform to the above syntax.
     #
     def write(self, newval, onlyIf=False, add=False, dictionary=False, updated=None):
+        j = self._writeParams(newval, onlyIf, add, updated)
+
+        self.__cachedState = None  # will need to refresh cache
+        api = self.__getAPI('events', 'POST')
+        try:
+            v = self.nr._simpleAPI(api, jdict=j)
+        except NumerousError as x:
+            v = self._writeError(x, newval, onlyIf)
+
+        return v if dictionary else v['value']
+
+    # the JSON for the events POST that write() does
+    @staticmethod
+    def _writeParams(newval, onlyIf, add, updated):
         j = { 'value' : newval }
         if onlyIf is not False:
             if onlyIf not in [ True, 'IGNORE' ]:
@@ -511,36 +653,25 @@ class NumerousMetric:
         if add:
             j['action'] = 'ADD'
         if updated:
-            # if you gave us a datetime, try converting it
-            # note: we truncate, rather than round, the microseconds
-            # for simplicity (in case usec is 999900 for example).
-            try:
-                ts = updated.strftime('%Y-%m-%dT%H:%M:%S.')
-                ts = "{}{:03d}Z".format(ts, updated.microsecond//1000)
-            except AttributeError:    # just take your argument
-                ts = updated          # which should be a string already
-
-            j['updated'] = ts
-
-        self.__cachedState = None  # will need to refresh cache
-        api = self.__getAPI('events', 'POST')
-        try:
-            v = self.nr._simpleAPI(api, jdict=j)
+            # if you gave us a datetime, it gets converted
+            j['updated'] = _numerousTimestamp(updated)
+        return j
 
-        except NumerousError as x:
-            # if onlyIf was specified and the error is "conflict"
-            # (meaning: no change), raise ConflictError specifically
-            # or ignore it if you specified onlyIf="IGNORE"
-            if onlyIf and x.code == requests.codes.conflict:    # 409
-                if onlyIf is not 'IGNORE':
-                    raise NumerousMetricConflictError(x.details, "No Change")
-                else:
-                    # forge a pseudo-result because you asked for it
-                    v = { 'value' : newval, 'unchanged' : True }
+    # Handle a NumerousError from the write() POST; either raises
+    # or returns a pseudo-result for the onlyIf='IGNORE' case
+    @staticmethod
+    def _writeError(x, newval, onlyIf):
+        # if onlyIf was specified and the error is "conflict"
+        # (meaning: no change), raise ConflictError specifically
+        # or ignore it if you specified onlyIf="IGNORE"
+        if onlyIf and x.code == requests.codes.conflict:    # 409
+            if onlyIf != 'IGNORE':
+                raise NumerousMetricConflictError(x.details, "No Change")
             else:
-                raise         # never mind, plain NumerousError is fine
-
-        return v if dictionary else v['value']
+                # forge a pseudo-result because you asked for it
+                return { 'value' : newval, 'unchanged' : True }
+        else:
+            raise x       # never mind, plain NumerousError is fine
 
     #
     # Write the parameters (description, etc) of a metric
@@ -564,19 +695,18 @@ class NumerousMetric:
     #
     def update(self, dict, overwriteAll=False):
         if overwriteAll:
-            self.__cachedState = {}
+            newParams = {}
         else:
-            self.__ensureCache()
-
-        # we don't have to .copy() this even though we modify it
-        # in place (via this newParams alias) below; it then gets
-        # refreshed anyway with the results of the simpleAPI call.
-        newParams = self.__cachedState
+            # copy because the cache could be shared (and the PUT could fail)
+            newParams = self.__ensureCache().copy()
         newParams.update(dict)
 
         api = self.__getAPI('metric', 'PUT')
-        self.__cachedState = self.nr._simpleAPI(api, jdict=newParams)
-        return self.__cachedState.copy()
+        v = self.nr._simpleAPI(api, jdict=newParams)
+        self.__cachedState = v
+        if self.nr._labelIndex is not None:
+            self.nr._labelIndex.update(v)     # in case label changed
+        return v.copy()
 
     #
     # common code for writing an interaction (comment/like/error)
@@ -616,8 +746,9 @@ class NumerousMetric:
     def photo(self, imageDataOrOpenFile, mimeType="image/jpeg"):
         api = self.__getAPI('photo', 'POST')
         mpart = { 'image' : ( 'image.img', imageDataOrOpenFile, mimeType) }
-        self.__cachedState = self.nr._simpleAPI(api, multipart=mpart)
-        return self.__cachedState.copy()
+        v = self.nr._simpleAPI(api, multipart=mpart)
+        self.__cachedState = v
+        return v.copy()
 
     def photoDelete(self):
         self.__cachedState = None    # I suppose we could have deleted photoURL
@@ -639,28 +770,7 @@ class NumerousMetric:
         elif evID:
             api = self.__getAPI('event', 'GET', eventID=evID)
         else:
-            try:
-                timestr = before.strftime('%Y-%m-%dT%H:%M:%S.')
-                try:
-                    # note: we truncate, rather than round, the microseconds.
-                    # If, for example, usec is 999900 (i.e, 999.9msec) then
-                    # rounding could cause a cascade of carries into the other
-                    # fields. So we'd really have to add 500 usec to the time
-                    # object and THEN convert it.
-                    # XXX consider fixing this; however, the numerous
-                    #     server never returns a sub-millisecond time, so it's
-                    #     hard to see how this will get us into trouble -- if
-                    #     you came up with a time object independent of the
-                    #     server you have no way to determine accurate
-                    #     semantics down to sub-one-millisecond granularity.
-                    #     Said differently: if this matters to you, convert
-                    #     to string yourself and use that directly.
-                    timestr += '{:03d}Z'.format(before.microsecond//1000)
-                except AttributeError: # if there isn't even a microseconds...
-                    timestr += '000Z'  # ... then obviously use 000msec
-
-            except AttributeError:
-                timestr = before      # no strftime; it should be a string
+            timestr = _numerousTimestamp(before)
             api = self.__getAPI('events', 'at', timestr=timestr)
 
         return self.nr._simpleAPI(api)
@@ -711,6 +821,8 @@ class NumerousMetric:
         self.__cachedState = None
         api = self.__getAPI('metric', 'DELETE')
         v = self.nr._simpleAPI(api)
+        if self.nr._labelIndex is not None:
+            self.nr._labelIndex.remove(self.id)
         # there is no return value
 
 # ################
@@ -720,9 +832,17 @@ class NumerousMetric:
 # This is your "connection" to the server (albeit there is no connection)
 # You generally just make one of these (or one per APIKey you are working with)
 # Then you instantiate NumerousMetric objects off of it.
-# If you are multi-threading you should make one of these per thread, if
-# only because I have no idea about the underlying requests/etc libraries.
 #
+# A single Numerous can be shared by multiple threads. There is one
+# transport (by default a NumerousRequestsTransport, i.e., a
+# requests.Session) per Numerous, created at construction time and never
+# swapped out, and its connection pool (poolSize connections per host)
+# lets keep-alive connections be reused by whichever thread needs one.
+# If more threads than poolSize are making requests at the same moment
+# the extra connections still work; they just don't get kept around
+# afterwards. So set poolSize to (at least) the number of threads.
+#
+# The statistics counters are updated under a lock (see _NumerousStatistics)
 #
 
 class Numerous:
@@ -832,7 +952,9 @@ class Numerous:
 
     #
     # server, if specified,  should be a naked FQDN
-    # (e.g., 'api.numerousapp.com')
+    # (e.g., 'api.numerousapp.com'). It can also be a full URL prefix
+    # (e.g., 'http://127.0.0.1:8080') which is how you point this at
+    # a local stand-in server (see tests/nrserver.py) for testing.
     #
     # The default throttle policy simply tries to obey the server's rate
     # limit parameters. You can write your own policies and specify them here.
@@ -845,9 +967,61 @@ class Numerous:
     #
     # see the throttleDefault function for more info/discussion
     #
+    # cacheTTL (seconds), if given, makes all NumerousMetric objects from
+    # this Numerous share one cache of metric attributes, holding at most
+    # cacheSize metrics. See NumerousMetric __getitem__ for discussion.
+    #
+    # labelIndexTTL (seconds), if given, makes metricByLabel use an index
+    # of your metric labels instead of reading the whole metrics collection
+    # every time. See metricByLabel.
+    #
+    # rateLimiter, if given, is a NumerousRateLimiter (or True to just make
+    # one) that admits requests BEFORE they are sent, rather than the default
+    # throttle policy reacting to the rate limit headers afterwards. See
+    # NumerousRateLimiter. To share the limit among several Numerous objects
+    # (using the same API key) give them all the same NumerousRateLimiter.
+    # rateLimiter='shared' makes a NumerousSharedRateLimiter for the apiKey,
+    # which shares the limit with all other processes doing the same.
+    #
+    # getRetries and hedgePercentile are for reducing the (tail) latency of
+    # GET requests; nothing else is affected, because only GETs are safe to
+    # send more than once. getRetries=N retries a GET up to N times (with a
+    # short randomized backoff) after a network error or a 5xx response.
+    # hedgePercentile=P sends a second, identical, GET if the first one has
+    # taken longer than P percent of recent GETs did, and takes whichever
+    # response comes back first. See _simpleAPI.
+    #
+    # circuitBreaker, if given, is a NumerousCircuitBreaker (or True to just
+    # make one) that makes requests fail right away (NumerousCircuitOpenError)
+    # for a while after the server seems to be down, rather than each one
+    # waiting to find that out for itself. See NumerousCircuitBreaker.
+    #
+    # timeout is the (connect, read) timeout in seconds for each request, or
+    # just one number for both. The default (None) waits forever. Requests
+    # that time out raise NumerousTimeoutError. See also deadline().
+    #
+    # blocking=False means never wait (for rate limits, retries, etc). Any
+    # time a wait would be needed NumerousRetryAfter is raised instead; see
+    # _throttleSleep.
+    #
+    # transport is what actually sends the requests: 'requests' (the
+    # default) or 'urllib3' (less overhead per request), or your own
+    # object. See NumerousRequestsTransport for what that has to do.
+    #
     def __init__(self, apiKey=None, server='api.numerousapp.com',
                                throttle=None,
-                               throttleData=None):
+                               throttleData=None,
+                               poolSize=10,
+                               cacheTTL=None,
+                               cacheSize=1000,
+                               labelIndexTTL=None,
+                               rateLimiter=None,
+                               getRetries=0,
+                               hedgePercentile=None,
+                               circuitBreaker=None,
+                               timeout=None,
+                               blocking=True,
+                               transport=None):
 
         if not apiKey:
             apiKey = numerousKey()
@@ -855,12 +1029,64 @@ class Numerous:
         # the serverName is just saved for informational purposes
         # the __serverURL is used with the various endpoints
         self.serverName = server
-        self.__serverURL = "https://" + server
+        if '://' in server:
+            self.__serverURL = server.rstrip('/')
+        else:
+            self.__serverURL = "https://" + server
         self.authTuple = (apiKey, '')
-        self.__session = None
         self.__debug = 0
         self._arbitraryMaximumTries = 10   # see throttle retry loop
-        self.statistics = defaultdict(int) # for info/debugging; various stats
+        self.statistics = _NumerousStatistics() # info/debugging; various stats
+        self.__poolSize = poolSize
+
+        # shared metric attribute cache, if requested (see NumerousMetric)
+        self._metricCache = None
+        if cacheTTL:
+            self._metricCache = _NumerousMetricCache(cacheTTL, cacheSize,
+                                                     self.statistics)
+
+        # label index for metricByLabel, if requested
+        self._labelIndex = None
+        if labelIndexTTL:
+            self._labelIndex = _NumerousLabelIndex(labelIndexTTL,
+                                                   self.statistics)
+
+        # proactive rate limiting, if requested
+        if rateLimiter is True:
+            rateLimiter = NumerousRateLimiter()
+        elif rateLimiter == 'shared':
+            rateLimiter = NumerousSharedRateLimiter(apiKey=apiKey)
+        self._rateLimiter = rateLimiter or None
+
+        # GET retries and hedging, if requested
+        self._getRetries = getRetries
+        self._hedgePercentile = hedgePercentile
+        self._getTimes = deque(maxlen=self._hedgeSamples)
+        self.__hedgePool = None
+        self.__hedgePoolLock = threading.Lock()
+
+        # circuit breaker, if requested
+        if circuitBreaker is True:
+            circuitBreaker = NumerousCircuitBreaker()
+        self._circuitBreaker = circuitBreaker or None
+
+        # request timeouts; always a (connect, read) tuple (or None) here
+        if timeout is not None and not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+        self._timeout = timeout
+
+        # non-blocking mode: see _throttleSleep
+        self._blocking = blocking
+        self._notBefore = 0
+
+        # (remaining, resetAt, when) from the most recent rate limit info
+        self._rateState = None
+
+        # made when first needed; see _adaptiveConcurrency
+        self._adaptive = None
+
+        # one transport (i.e., one connection pool) shared by all threads
+        self._transport = self._makeTransport(transport, poolSize)
 
         # throttle policy tuple is: function, data, up
         # where "data" is the throttle policy specific data
@@ -870,8 +1096,14 @@ class Numerous:
         # data input, with the following keys:
         #   'voluntary' : threshold for voluntary throttling before actual 429
         #   'volmaxdelay' : maximum arbitrary voluntary throttle delay
+        #   'backoff' : NumerousBackoff for the delays after a 429
+        #   'priorityScale' : voluntary throttling multiplier per priority
         #
-        systemTP = { 'voluntary' : 40, 'volmaxdelay' : 5 }
+        systemTP = { 'voluntary' : 40, 'volmaxdelay' : 5,
+                     'backoff' : NumerousBackoff(),
+                     'priorityScale' : { 'interactive' : 0,
+                                         'normal' : 1,
+                                         'bulk' : 2 } }
 
         # you can alter the above parameters but keep
         # the default throttle function:
@@ -896,11 +1128,28 @@ class Numerous:
         self.agentString = myVersion + " " + pyV + " NumerousAPI/v2"
         self._filterDuplicates = True    # see discussion elsewhere
 
+    # the transport argument of the constructor -> the transport object
+    def _makeTransport(self, transport, poolSize):
+        if transport in (None, 'requests'):
+            transport = NumerousRequestsTransport(poolSize)
+        elif transport == 'urllib3':
+            transport = NumerousUrllib3Transport(poolSize)
+        return transport
+
     # __str__ method for human readable string.
     # No particularly good reason for this other than "because can"
     def __str__(self):
         return "<{} {{{}}} @ {}>".format(self.__class__.__name__, self.serverName, hex(id(self)))
 
+    # Discard the shared metric cache entry for metricId, or all of them.
+    # No effect if there is no shared cache (no cacheTTL).
+    def flushCache(self, metricId=None):
+        if self._metricCache is not None:
+            if metricId is None:
+                self._metricCache.clear()
+            else:
+                self._metricCache.invalidate(self.metric(metricId).id)
+
 
     # XXX This is primarily for testing; control filtering of bogus duplicates
     #     If you are calling this you are probably doing something wrong.
@@ -924,6 +1173,8 @@ class Numerous:
     #     nr is the Numerous
     #     tparams is a dictionary containing:
     #         'attempt'        : the attempt number. Zero on the very first try
+    #         'elapsed'        : seconds since the first try was sent
+    #         'priority'       : 'interactive', 'normal', or 'bulk'
     #         'rate-remaining' : X-Rate-Limit-Remaining reported by the server
     #         'rate-reset'     : time (in seconds) until fresh rate granted
     #         'result-code'    : HTTP code from server (e.g., 409, 200, etc)
@@ -961,9 +1212,8 @@ class Numerous:
 
         # just some stats for curiousity and debugging:
         if attempt > 0:
-            nr.statistics['throttleMultipleAttempts'] += 1
-            if attempt > nr.statistics['throttleMaxAttempt']:
-                nr.statistics['throttleMaxAttempt'] = attempt
+            nr.statistics.incr('throttleMultipleAttempts')
+            nr.statistics.maxof('throttleMaxAttempt', attempt)
 
         # if we weren't told to back off, no need to retry
         if tparams['result-code'] != requests.codes.too_many_requests:  #429
@@ -979,12 +1229,23 @@ class Numerous:
             #
             # at constructor time our "throttle data" (td) was set up with
             # the 'voluntary' arbitrary limit
+            #
+            # None of this is needed with a rateLimiter; it has already
+            # paced the requests (and slowing down here would be double
+            # counting the same problem).
+            #
+            # The priority scales all this: bulk requests start slowing
+            # down sooner, and by more, leaving the rest of the allocation
+            # for everything else. Interactive requests never slow down.
             APIs_left = tparams['rate-remaining']
-            if APIs_left >= 0 and APIs_left < td['voluntary']:
-                nr.statistics['throttleVoluntaryBackoff'] += 1
-                dt = Numerous.__compute_voluntary_delay(tparams, td)
-                nr.statistics['throttleVoluntaryDelays'] += dt
-                time.sleep(dt)
+            scale = td['priorityScale'].get(tparams['priority'], 1)
+            if nr._rateLimiter is not None:
+                pass
+            elif APIs_left >= 0 and APIs_left < td['voluntary'] * scale:
+                nr.statistics.incr('throttleVoluntaryBackoff')
+                dt = Numerous.__compute_voluntary_delay(tparams, td) * scale
+                nr.statistics.incr('throttleVoluntaryDelays', dt)
+                nr._throttleSleep(dt, after=True)
 
             return False               # no retry
 
@@ -996,15 +1257,17 @@ class Numerous:
         # on the server) the backoff increases with each attempt.
         #
 
-        # Find a backoff and implicitly determine if tried too many times:
-        # [ XXX should be randomized slightly but this is already silly ]
-        try:
-            backoff = [ 0.75, 1.5, 5, 15, 45 ][attempt]
-        except IndexError:
-            nr.statistics['throttleMaxed'] += 1
+        # The NumerousBackoff decides on the extra delay (randomized so that
+        # lots of threads that all got a 429 don't all come back at exactly
+        # the same moment) and whether this has gone on too long.
+        backoff = td['backoff'].delay(attempt, tparams['rate-reset'],
+                                      tparams['elapsed'])
+        if backoff is None:
+            nr.statistics.incr('throttleMaxed')
             return False               # too many tries
-        nr.statistics['throttle429'] += 1
-        time.sleep(tparams['rate-reset'] + backoff)
+        nr.statistics.incr('throttle429')
+        nr.statistics.incr('throttleBackoffDelays', backoff)
+        nr._throttleSleep(tparams['rate-reset'] + backoff)
         return True    # this is what tells simpleAPI to retry
 
     #
@@ -1058,6 +1321,135 @@ class Numerous:
         return min(td['volmaxdelay'], secs_per_API)
 
 
+    # All the delays of the default throttle policy go through here (rather
+    # than calling time.sleep directly) so that a variant of this class can
+    # change what "waiting" means. AsyncNumerous, for example, must not
+    # block the event loop; it remembers the delay and awaits it instead.
+    #
+    # after=True means the current request is done (and fine) and this delay
+    # is just to slow down the ones after it (the voluntary throttle delay)
+    #
+    # In non-blocking mode (blocking=False) nothing waits. A delay that has
+    # to happen before this request can go on (a 429, etc) raises
+    # NumerousRetryAfter, and the caller decides how (and whether) to wait
+    # before trying again. An "after" delay instead holds off the NEXT
+    # request: until then, requests raise NumerousRetryAfter without being
+    # sent. Either way the caller is free to do other work in the meantime.
+    #
+    def _throttleSleep(self, dt, after=False):
+        self._noteThrottled()
+        if not self._blocking:
+            self._noWait(dt, after)
+            return
+        if after:
+            dt = self._deadlineClip(dt)
+        else:
+            self._deadlineCheck(dt)
+        time.sleep(dt)
+
+    # tells the NumerousAdaptiveConcurrency (if any) there was a delay
+    @staticmethod
+    def _noteThrottled():
+        throttled = _numerousThrottled.get()
+        if throttled is not None:
+            throttled[0] = True
+
+    # the non-blocking version of waiting dt (see _throttleSleep)
+    def _noWait(self, dt, after=False):
+        if after:
+            self._notBefore = max(self._notBefore, time.time() + dt)
+            self.statistics.incr('retryAfterDeferred')
+        else:
+            self.statistics.incr('retryAfterRaised')
+            raise NumerousRetryAfter(dt)
+
+    # called before each request; the other half of after=True above
+    def _notBeforeCheck(self):
+        dt = self._notBefore - time.time()
+        if dt > 0:
+            self._noWait(dt)
+
+    #
+    # Everything done inside:
+    #
+    #    with nr.deadline(seconds):
+    #         ...
+    #
+    # has to be done within that many seconds. That includes all the retries
+    # and throttle delays, not just the time spent waiting for the server.
+    # A delay that would go past the deadline isn't even started; instead,
+    # NumerousTimeoutError is raised right away. Request timeouts (see the
+    # timeout argument to __init__) are shortened to fit as well.
+    #
+    # The deadline is per thread (per task, with AsyncNumerous) and applies
+    # to any Numerous used inside it. Nested deadlines can only make it
+    # sooner, not later.
+    #
+    @contextlib.contextmanager
+    def deadline(self, seconds):
+        t = time.time() + seconds
+        prev = _numerousDeadline.get()
+        if prev is not None:
+            t = min(t, prev)
+        token = _numerousDeadline.set(t)
+        try:
+            yield t
+        finally:
+            _numerousDeadline.reset(token)
+
+    #
+    # Everything done inside:
+    #
+    #    with nr.priority('bulk'):
+    #         ...
+    #
+    # is done at that priority: 'interactive', 'normal' (the default),
+    # or 'bulk'. When the rate allocation is running low, lower priority
+    # requests are the ones that slow down (see the default throttle policy)
+    # or that wait for the next rate window (see NumerousRateLimiter), so
+    # that higher priority requests still get through.
+    #
+    # Like deadline(), it's per thread (or asyncio task), and applies to any
+    # Numerous used inside it.
+    #
+    _priorities = ('interactive', 'normal', 'bulk')
+
+    @contextlib.contextmanager
+    def priority(self, p):
+        if p not in self._priorities:
+            raise ValueError("priority must be one of {}".format(
+                                                            self._priorities))
+        token = _numerousPriority.set(p)
+        try:
+            yield p
+        finally:
+            _numerousPriority.reset(token)
+
+    # raises NumerousTimeoutError if waiting dt would go past the deadline
+    def _deadlineCheck(self, dt=0):
+        t = _numerousDeadline.get()
+        if t is not None and time.time() + dt > t:
+            self.statistics.incr('deadlineExceeded')
+            raise NumerousTimeoutError("deadline exceeded")
+
+    # dt, or less if that would go past the deadline
+    def _deadlineClip(self, dt):
+        t = _numerousDeadline.get()
+        if t is None:
+            return dt
+        return max(min(dt, t - time.time()), 0)
+
+    # the (connect, read) timeout for a request, shortened for the deadline
+    def _requestTimeout(self):
+        tmo = self._timeout
+        t = _numerousDeadline.get()
+        if t is None:
+            return tmo
+        left = max(t - time.time(), 0.001)
+        if tmo is None:
+            return (left, left)
+        return (min(tmo[0], left), min(tmo[1], left))
+
     # control debugging level
     def debug(self, lvl=1):
         prev = self.__debug
@@ -1130,6 +1522,15 @@ class Numerous:
     #
     #  * anything else is an error
     #
+    # If the Numerous was made with a labelIndexTTL, the labels come from
+    # an index (a saved copy of the metrics collection) instead. The index
+    # is read from the server the first time it is needed and again when
+    # it is more than labelIndexTTL seconds old (or if you refreshLabelIndex)
+    # so most lookups make no server requests at all. createMetric and
+    # crushKillDestroy (and updates that change a label) keep the index up
+    # to date; metrics created or deleted some other way won't be noticed
+    # until the next refresh.
+    #
 
     def metricByLabel(self, labelspec, matchType='FIRST'):
 
@@ -1143,54 +1544,92 @@ class Numerous:
                 rv = None
             return rv
 
-        bestMatch = None
-        bestMatchLen = 0
-
-        if matchType == "STRING":
-            rx = None
+        idx = self._labelIndex
+        if idx is None:
+            candidates = self.metrics()
         else:
-            rx = re.compile(labelspec)
+            if idx.expired():
+                self.refreshLabelIndex()
+            candidates = idx.candidates(labelspec, matchType)
 
-        conflictString = "More than one match"
-        for m in self.metrics():
-            if not rx:                            # i.e., STRING, no regexp
-                if m['label'] == labelspec:
-                    if bestMatch:
-                        raise NumerousMetricConflictError((bestMatch['label'],
-                                                           m['label']),
-                                                          conflictString)
-
-                    bestMatch = m
-            else:
-                matchx = rx.search(m['label'])
-                if matchx:
-                    if matchType == "FIRST":
-                        return self.metric(m['id'])
-                    elif matchType == "ONE" and bestMatch:
-                        raise NumerousMetricConflictError((bestMatch['label'],
-                                                           m['label']),
-                                                          conflictString)
-
-                    # if this is "better" than our current best match, keep it
-                    sp = matchx.span()
-                    matchlen = sp[1] - sp[0]
-                    if matchlen > bestMatchLen:
-                        bestMatch = m
-                        bestMatchLen = matchlen
+        matcher = _Numerous_LabelMatch(labelspec, matchType)
+        for m in candidates:
+            if matcher.feed(m):
+                break
 
         rv = None
+        bestMatch = matcher.result()
         if bestMatch:
             rv = self.metric(bestMatch['id'])
 
         return rv
 
+    #
+    # metricByLabel for a whole list of labelspecs at once, with a single
+    # pass over the metrics collection (or the label index, if any).
+    # The matchType applies to all of them and means the same thing it does
+    # for metricByLabel.
+    #
+    # Returns a list in the same order as labelspecs. Each entry is the
+    # NumerousMetric, or None if no match, or (for 'ONE' and 'STRING') the
+    # NumerousMetricConflictError if there were multiple matches. With
+    # matchType 'ID' the metrics are validated via readMany and an entry
+    # can also be a NumerousError for some other failure.
+    #
+    def metricsByLabels(self, labelspecs, matchType='FIRST'):
+        labelspecs = list(labelspecs)
+        if not matchType:
+            matchType = "FIRST"
+        if matchType not in [ "FIRST", "BEST", "ONE", "STRING", "ID" ]:
+            raise ValueError(matchType)
+        if matchType == "ID":
+            return self._validatedMany(labelspecs)
+
+        idx = self._labelIndex
+        if idx is None:
+            candidates = self.metrics()
+        else:
+            if idx.expired():
+                self.refreshLabelIndex()
+            candidates = idx.metrics()
+
+        matcher = _Numerous_MultiLabelMatch(labelspecs, matchType)
+        for m in candidates:
+            if matcher.feed(m):
+                break
+
+        return [ self.metric(r['id']) if isinstance(r, dict) else r
+                 for r in matcher.result() ]
+
+    # the matchType 'ID' case of metricsByLabels
+    def _validatedMany(self, ids):
+        ms = self.readMany(ids)
+        return self._validatedResults(ids, ms)
+
+    def _validatedResults(self, ids, ms):
+        rslt = []
+        for id in ids:
+            v = ms[self.metric(id).id]
+            if isinstance(v, NumerousError):
+                bad = (requests.codes.bad_request, requests.codes.not_found)
+                if v.code in bad:
+                    v = None
+            rslt.append(v)
+        return rslt
+
+    # (re)read the label index (see metricByLabel) from the server now
+    def refreshLabelIndex(self):
+        if self._labelIndex is not None:
+            self._labelIndex.load(list(self.metrics()))
 
     # iterator for the entire metrics collection.
     # By default gets your own metrics list but you can specify other users
-    def metrics(self, userId=None):
+    # See _Numerous_ChunkedAPIIter for prefetch and limit
+    def metrics(self, userId=None, prefetch=0, limit=None):
         info = self.__APIInfo['metrics-collection']
         api = self._makeAPIcontext(info, 'GET', userId=userId)
-        return _Numerous_ChunkedAPIIter(self, api)
+        return _Numerous_ChunkedAPIIter(self, api,
+                                        prefetch=prefetch, limit=limit)
 
     # return User info (Default is yourself)
     def user(self, userId=None):
@@ -1208,10 +1647,11 @@ class Numerous:
 
     # iterator for per-user subscriptions. Note: users really
     # can't get anyone's subscriptions other than their own
-    def subscriptions(self, userId=None):
+    def subscriptions(self, userId=None, prefetch=0, limit=None):
         info = self.__APIInfo['subscriptions']
         api = self._makeAPIcontext(info, 'GET', userId=userId)
-        return _Numerous_ChunkedAPIIter(self, api)
+        return _Numerous_ChunkedAPIIter(self, api,
+                                        prefetch=prefetch, limit=limit)
 
     # return the most popular metrics (returns "count" of them; default 10)
     def mostPopular(self, count=None):
@@ -1225,6 +1665,46 @@ class Numerous:
         ignored = self.user()
         return True      # errors throw exceptions
 
+    #
+    # Make sure there are at least n API calls left in the current rate
+    # window, waiting for the next window if not. Use this before a burst
+    # of n calls that shouldn't get split up by a 429 in the middle.
+    #
+    # The rate limit info from the most recent response is used if it is
+    # less than maxAge seconds old (and from the current window); otherwise
+    # this does a ping() to find out. Returns how long it waited (0 if it
+    # didn't). The waiting is done the same way as the throttle delays, so
+    # deadline() and blocking=False (NumerousRetryAfter) apply to it too.
+    #
+    # This is only a snapshot: anything else using the same API key could
+    # still use up the allocation before the burst is done. If the server
+    # doesn't send rate limit info (e.g., something in between strips the
+    # headers) there's nothing to go on and this just returns 0.
+    #
+    def ensureBudget(self, n, maxAge=5):
+        if not self._budgetKnown(maxAge):
+            self.ping()
+        dt = self._budgetWait(n)
+        if dt > 0:
+            self._throttleSleep(dt)
+        return dt
+
+    def _budgetKnown(self, maxAge):
+        rs = self._rateState
+        now = time.time()
+        return rs is not None and now - rs[2] < maxAge and now < rs[1]
+
+    # how long to wait for n API calls to be available (0 if they are now)
+    def _budgetWait(self, n):
+        rs = self._rateState
+        if rs is None or rs[1] <= time.time():    # nothing (current) known
+            return 0
+        remaining, resetAt, ignored = rs
+        if remaining >= n:
+            return 0
+        self.statistics.incr('budgetWaits')
+        return max(resetAt - time.time(), 0) + 1   # +1: reset is to-the-second
+
     #
     # Create a brand new metric on the server
     # Returns a NumerousMetric object
@@ -1247,8 +1727,156 @@ class Numerous:
         v = self._simpleAPI(api, jdict=j)
         m = self.metric(v['id'])
 
+        if self._labelIndex is not None:
+            self._labelIndex.add(v)
         return m
 
+    #
+    # Read a bunch of metrics at once. The reads are done in parallel
+    # by up to "concurrency" threads (default: the poolSize given to the
+    # constructor; more than that just churns connections)
+    #
+    # concurrency='adaptive' finds the number of threads as it goes
+    # instead (up to poolSize); see NumerousAdaptiveConcurrency.
+    #
+    # ids can be anything metric() accepts (ID strings, URLs, the dicts
+    # from the metrics() and subscriptions() iterators, etc) and can also
+    # be NumerousMetric objects.
+    #
+    # Returns a dictionary keyed by metric ID. Each value is either a
+    # NumerousMetric whose cached attributes were just read (so m['value'],
+    # m['label'], etc. won't need another server trip) or the exception
+    # (usually a NumerousError) from that particular read. One failure
+    # doesn't stop the others; nothing a single read raises is raised
+    # by readMany itself.
+    #
+    # Each read goes through the throttle policy like any other request so
+    # the rate limits are respected; expect it to slow down (not fail) if
+    # you read more metrics than your remaining API allocation.
+    #
+    def readMany(self, ids, concurrency=None):
+        ms = self._uniqueMetrics(ids)
+        rslts = self._fanOut(lambda m: m.read(), ms.values(), concurrency)
+        return self._manyResults(ms, rslts)
+
+    #
+    # Write a bunch of metrics at once, in parallel (see readMany)
+    #
+    # values is a dictionary: { metric : value } where metric is anything
+    # that readMany accepts as an id. The value can be a dictionary of
+    # write() keyword arguments, with the value itself under 'value':
+    #
+    #    nr.writeMany({ id1 : 17,
+    #                   id2 : { 'value' : 1, 'add' : True },
+    #                   id3 : { 'value' : 5, 'onlyIf' : 'IGNORE' } })
+    #
+    # Returns a dictionary keyed by metric ID; each value is whatever write()
+    # returned for that metric, or the exception (usually a NumerousError)
+    # it raised. In particular an onlyIf=True write of an unchanged value
+    # shows up as a NumerousMetricConflictError in the results (and doesn't
+    # stop the other writes), exactly as write() would have raised it.
+    #
+    # Everything in values is checked before any writes are done: two
+    # keys for the same metric (e.g., its ID and a NumerousMetric for it),
+    # or a dictionary without 'value', raise ValueError.
+    #
+    def writeMany(self, values, concurrency=None):
+        work = self._writeManyWork(values)
+        rslts = self._fanOut(lambda w: w[1].write(**w[2]), work, concurrency)
+        return { w[0] : r for w, r in zip(work, rslts) }
+
+    # list of (id, metric, write-kwargs) for writeMany
+    def _writeManyWork(self, values):
+        work = []
+        seen = set()
+        for k, v in values.items():
+            m = k if isinstance(k, NumerousMetric) else self.metric(k)
+            if m.id in seen:
+                raise ValueError("writeMany: metric {} given more than "
+                                 "once".format(m.id))
+            seen.add(m.id)
+            if isinstance(v, dict):
+                if 'value' not in v:
+                    raise ValueError("writeMany: no 'value' in the "
+                                     "arguments for metric {}".format(m.id))
+                kw = v.copy()
+                kw['newval'] = kw.pop('value')
+            else:
+                kw = { 'newval' : v }
+            work.append((m.id, m, kw))
+        return work
+
+    # turn a list of things-that-are-metrics into a dictionary of
+    # NumerousMetric objects keyed by ID (which also removes duplicates)
+    def _uniqueMetrics(self, ids):
+        ms = {}
+        for i in ids:
+            if not isinstance(i, NumerousMetric):
+                i = self.metric(i)
+            ms.setdefault(i.id, i)
+        return ms
+
+    # per-ID results for readMany: the metric, or the exception
+    @staticmethod
+    def _manyResults(ms, rslts):
+        return { id : r if isinstance(r, Exception) else m
+                 for (id, m), r in zip(ms.items(), rslts) }
+
+    # Performs func(item) for each item, in parallel, and returns the list
+    # of results in the same order. An exception from any one of them (not
+    # just a NumerousError) is returned, not raised, as that item's result;
+    # so one bad item can't lose the results of all the others.
+    def _fanOut(self, func, items, concurrency=None):
+        items = list(items)
+        adaptive = self._adaptiveConcurrency(concurrency)
+        if adaptive:
+            concurrency = adaptive.maximum
+        elif not concurrency:
+            concurrency = self.__poolSize
+        concurrency = max(1, min(concurrency, len(items)))
+
+        def oneItem(x):
+            try:
+                return func(x)
+            except Exception as e:
+                return e
+
+        def adaptiveItem(x):
+            adaptive.acquire()
+            t0 = time.time()
+            throttled = [False]
+            _numerousThrottled.set(throttled)
+            try:
+                return oneItem(x)
+            finally:
+                adaptive.release(time.time() - t0, throttled[0])
+                self.statistics['adaptiveLimit'] = adaptive.limit
+
+        self.statistics.incr('fanOutItems', len(items))
+        self.statistics.maxof('fanOutMaxThreads', concurrency)
+        if concurrency == 1:
+            return [ oneItem(x) for x in items ]
+
+        # each item runs in (a copy of) this thread's context so that a
+        # deadline() applies to the pool threads too
+        f = adaptiveItem if adaptive else oneItem
+        ctxs = [ contextvars.copy_context() for x in items ]
+        with concurrent.futures.ThreadPoolExecutor(concurrency) as pool:
+            return list(pool.map(lambda c, x: c.run(f, x), ctxs, items))
+
+    # The NumerousAdaptiveConcurrency for a _fanOut, or None. The one
+    # made for concurrency='adaptive' is kept (so what it learned carries
+    # over from one readMany/writeMany to the next).
+    def _adaptiveConcurrency(self, concurrency):
+        if isinstance(concurrency, NumerousAdaptiveConcurrency):
+            return concurrency
+        if concurrency != 'adaptive':
+            return None
+        if self._adaptive is None:
+            self._adaptive = NumerousAdaptiveConcurrency(
+                                                maximum=self.__poolSize)
+        return self._adaptive
+
 
     # ALL api exchanges with the Numerous server go through here except
     # for _getRedirect() which is a special case (hack) for photo URLs
@@ -1276,7 +1904,197 @@ class Numerous:
     #
     def _simpleAPI(self, api, jdict=None, multipart=None, url=None):
 
-        self.statistics['simpleAPI'] += 1
+        self.statistics.incr('simpleAPI')
+        httpmeth, url, hdrs, data = self._prepareRequest(api, jdict,
+                                                         multipart, url)
+
+        # on general principles we aren't going to try "forever"; it's really
+        # the throttle policy that is responsible for limiting this loop.
+        # However, if the "arbitraryMax" is sufficiently large it might still
+        # seem like forever. All of this is up to you (if you supply your own)
+        started = time.time()
+        retried = 0
+        for attempt in range(self._arbitraryMaximumTries):
+
+            self._deadlineCheck()
+            self._notBeforeCheck()
+            self._circuitAdmit()
+            self._rateAdmit()
+            self.statistics.incr('serverRequests')
+            if self.__debug > 0:
+                print(("DEBUG: request({}, {})".format(httpmeth, url)))
+
+            try:
+                tmo = self._requestTimeout()
+                hedgeAfter = self._hedgeAfter(httpmeth)
+                if hedgeAfter is None:
+                    resp = self.__send(httpmeth, url, hdrs, data, multipart,
+                                       tmo)
+                else:
+                    resp = self.__sendHedged(url, hdrs, hedgeAfter, tmo)
+            except (requests.exceptions.RequestException,
+                    requests.exceptions.ConnectionError) as x:
+                self._rateObserve(-1, -1)     # i.e., no longer in flight
+                self._circuitResult(False)
+                dt = self._getRetryDelay(httpmeth, retried, attempt)
+                if dt is None:
+                    if isinstance(x, requests.exceptions.Timeout):
+                        raise NumerousTimeoutError(x)
+                    raise NumerousNetworkError(x)
+                retried += 1
+                self._throttleSleep(dt)
+                continue
+            except BaseException:
+                # anything else (KeyboardInterrupt, a bug in a custom
+                # transport, ...): no response, but still not in flight
+                self._rateObserve(-1, -1)
+                raise
+
+            # record elapsed round trip time, possibly in an array
+            self.statistics.recordTime(resp.elapsed.total_seconds())
+            self._circuitResult(resp.status_code < 500)
+
+            if self.__debug > 9:
+                print((resp.text))
+
+            if self._throttle(attempt, resp.status_code, resp.headers,
+                              resp, httpmeth, url, jdict, started):
+                continue
+
+            # the throttle policy didn't want a retry but a 5xx GET might
+            dt = None
+            if resp.status_code >= 500:
+                dt = self._getRetryDelay(httpmeth, retried, attempt)
+            if dt is None:
+                break
+            retried += 1
+            self._throttleSleep(dt)
+
+        # at this point we're out of the retry loop because the throttle
+        # policy returned false (i.e., no retry needed).
+        return self._finishResponse(api, url, resp.status_code,
+                                    resp.reason, resp.text)
+
+    # Sends one request. The transport is shared by all threads.
+    def __send(self, httpmeth, url, hdrs, data, multipart, timeout):
+        resp = self._transport.request(httpmeth, url, self.authTuple,
+                                       hdrs, data, multipart, timeout)
+        if httpmeth == 'GET':
+            self._getTimes.append(resp.elapsed.total_seconds())
+        return resp
+
+    #
+    # A hedged GET. The request is made in a (separate) thread and if it
+    # hasn't come back after hedgeAfter seconds the same request is made
+    # again; whichever response arrives first (successfully) is the one
+    # used. The other one (even if it finished at the same moment) goes to
+    # _hedgeLoser, so its rate limit info goes to the rateLimiter (if any)
+    # when it is done.
+    #
+    # Making the hedge request is never worth waiting for the rateLimiter,
+    # so if it won't admit the hedge right away there just isn't one.
+    #
+    def __sendHedged(self, url, hdrs, hedgeAfter, timeout):
+        with self.__hedgePoolLock:
+            if not self.__hedgePool:
+                self.__hedgePool = concurrent.futures.ThreadPoolExecutor(
+                                            max_workers=2*self.__poolSize)
+        pool = self.__hedgePool
+        sendArgs = (self.__send, 'GET', url, hdrs, None, None, timeout)
+
+        first = pool.submit(*sendArgs)
+        done, pending = concurrent.futures.wait([first], timeout=hedgeAfter)
+        if done or not self._hedgeAdmit():
+            return first.result()
+
+        self.statistics.incr('hedgeRequests')
+        pending = { first, pool.submit(*sendArgs) }
+        loser = lambda f: self._hedgeLoser(f, f.result)
+        finished = []
+        try:
+            while pending and not self._hedgeWinner(finished):
+                done, pending = concurrent.futures.wait(
+                   pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                finished.extend(done)
+        except BaseException:
+            # the caller observes one of them; the rest are done here
+            for f in (finished + list(pending))[1:]:
+                f.add_done_callback(loser)
+            raise
+
+        f = self._hedgeWinner(finished) or finished[0]
+        for other in finished + list(pending):
+            if other is not f:
+                other.add_done_callback(loser)
+        if f is not first and f.exception() is None:
+            self.statistics.incr('hedgeWins')
+        return f.result()
+
+    #
+    # Hedging and GET retry helpers, shared with AsyncNumerous.
+    #
+    # The hedging threshold is the hedgePercentile of the latencies of the
+    # most recent _hedgeSamples GETs; until there are _hedgeMinSamples of
+    # them there's no telling what "slow" is, so no hedging.
+    #
+    _hedgeSamples = 200
+    _hedgeMinSamples = 20
+
+    def _hedgeAfter(self, httpmeth):
+        if self._hedgePercentile is None or httpmeth != 'GET':
+            return None
+        times = sorted(self._getTimes)
+        if len(times) < self._hedgeMinSamples:
+            return None
+        i = int(len(times) * self._hedgePercentile / 100.0)
+        return times[min(i, len(times) - 1)]
+
+    # The first of the finished requests that succeeded, or None. The
+    # one returned is observed by the caller (with its response, or as a
+    # failure if none succeeded); every other one, whether it finished at
+    # the same time or is still going, goes to _hedgeLoser.
+    @staticmethod
+    def _hedgeWinner(finished):
+        for f in finished:
+            if f.exception() is None:
+                return f
+        return None
+
+    # the rateLimiter (if any) has to admit a hedge request immediately
+    def _hedgeAdmit(self):
+        if self._rateLimiter is None:
+            return True
+        return self._rateLimiter.acquire(_numerousPriority.get()) == 0
+
+    # a hedge loser finished; its rate limit info still has to be observed.
+    # result is the function returning its response headers.
+    def _hedgeLoser(self, f, result):
+        if f.cancelled() or f.exception() is not None:
+            self._rateObserve(-1, -1)
+        else:
+            self._rateObserve(*self._rateInfo(result().headers))
+
+    # Returns the delay before retrying a GET that failed (network error or
+    # 5xx) after having already been retried n times, or None for no retry.
+    # There's never a retry after the last attempt _simpleAPI will make
+    # (otherwise its loop would end without a response to return).
+    def _getRetryDelay(self, httpmeth, n, attempt):
+        if httpmeth != 'GET' or n >= self._getRetries:
+            return None
+        if attempt >= self._arbitraryMaximumTries - 1:
+            return None
+        self.statistics.incr('getRetries')
+        return random.uniform(0, min(2.0, 0.1 * (2 ** n)))
+
+    #
+    # The pieces of _simpleAPI that don't depend on how the request is
+    # actually sent. These are shared with the AsyncNumerous variant.
+    #
+    # _prepareRequest figures out the full URL, headers, and body.
+    # It returns (httpmeth, url, headers, data); multipart (if any) is
+    # modified in place (see comment below)
+    #
+    def _prepareRequest(self, api, jdict, multipart, url):
 
         # take the base url if you didn't give us an override
         if not url:
@@ -1309,118 +2127,142 @@ class Numerous:
                 pass
 
         httpmeth = api['http-method']   # 'GET' / 'PUT' / 'POST' / etc
+        return (httpmeth, url, hdrs, data)
 
-        # on general principles we aren't going to try "forever"; it's really
-        # the throttle policy that is responsible for limiting this loop.
-        # However, if the "arbitraryMax" is sufficiently large it might still
-        # seem like forever. All of this is up to you (if you supply your own)
-        for attempt in range(self._arbitraryMaximumTries):
-
-            self.statistics['serverRequests'] += 1
-            if self.__debug > 0:
-                print(("DEBUG: request({}, {})".format(httpmeth, url)))
-
-            try:
-
-                # the theory here is: make a new Session (next time)
-                # if we ever exception out of here. I'm not entirely sure
-                # this is a good/bad/effective/useless idea.
-                session = self.__session or requests.Session()
-                self.__session = None
-                resp = session.request(httpmeth, url,
-                                        auth=self.authTuple,
-                                        data=data,
-                                        files=multipart,
-                                        headers=hdrs)
-                self.__session = session
-            except (requests.exceptions.RequestException,
-                    requests.exceptions.ConnectionError) as x:
-                raise NumerousNetworkError(x)
-
-            # record elapsed round trip time, possibly in an array
-            et = resp.elapsed.total_seconds()
-            try:
-                times = self.statistics['serverResponseTimes']
-                times.insert(0, et)
-                times.pop()
-            except AttributeError:
-                self.statistics['serverResponseTimes'] = et
-
-            if self.__debug > 9:
-                print((resp.text))
+    #
+    # Given a response (status code, headers, and the response object itself)
+    # pick out the rate limit information and invoke the throttle policy.
+    # Returns what the throttle policy returned (True means "retry")
+    #
+    def _throttle(self, attempt, status, headers, resp, httpmeth, url, jdict,
+                  started):
+        r_remain, r_reset = self._rateInfo(headers)
 
-            try:
-                r_remain = int(resp.headers['X-Rate-Limit-Remaining'])
-                r_reset = int(resp.headers['X-Rate-Limit-Reset'])
-            except (KeyError, ValueError):
-                # some server errors (e.g., Not Authorized) give no rate info
-                r_remain = -1
-                r_reset = -1
+        # make them available in statistics as an FYI
+        self.statistics.update({ 'rate-remaining' : r_remain,
+                                 'rate-reset' : r_reset })
+        self._rateObserve(r_remain, r_reset)
+        if r_reset >= 0:
+            now = time.time()
+            self._rateState = (max(r_remain, 0), now + r_reset, now)
 
-            # make them available in statistics as an FYI
-            self.statistics['rate-remaining'] = r_remain
-            self.statistics['rate-reset'] = r_reset
 
+        # invoke the rate-limiting ("throttle") policy.
+        #
+        # NOTE: the "normal" case is for the throttle to return False,
+        # meaning "no retry needed". That is the normal path for the
+        # "for attempts in ..." loop to break (almost always with just
+        # one attempt). Assuming the standard throttle policy is in use,
+        # only 429/TooManyRequests causes multiple attempts.
+        #
 
-            # invoke the rate-limiting ("throttle") policy.
-            #
-            # NOTE: the "normal" case is for the throttle to return False,
-            # meaning "no retry needed". That is the normal path for the
-            # "for attempts in ..." loop to break (almost always with just
-            # one attempt). Assuming the standard throttle policy is in use,
-            # only 429/TooManyRequests causes multiple attempts.
-            #
+        # lots and lots of params, sorry, that's just the way it is...
+        tp = { 'debug' : self.__debug, 'attempt' : attempt,
+               'elapsed' : time.time() - started,
+               'priority' : _numerousPriority.get(),
+               'rate-remaining' : r_remain, 'rate-reset' : r_reset,
+               'result-code' : status, 'resp' : resp,
+               'request' : { 'http-method' : httpmeth, 'url' : url,
+                             'jdict' : jdict }
+             }
+        td = self.__throttlePolicy[1]
+        up = self.__throttlePolicy[2]
+        return self.__throttlePolicy[0](self, tp, td, up)
+
+    # the rate limit info from response headers: (remaining, reset)
+    @staticmethod
+    def _rateInfo(headers):
+        try:
+            return (int(headers['X-Rate-Limit-Remaining']),
+                    int(headers['X-Rate-Limit-Reset']))
+        except (KeyError, ValueError):
+            # some server errors (e.g., Not Authorized) give no rate info
+            return (-1, -1)
 
-            # lots and lots of params, sorry, that's just the way it is...
-            tp = { 'debug' : self.__debug, 'attempt' : attempt,
-                   'rate-remaining' : r_remain, 'rate-reset' : r_reset,
-                   'result-code' : resp.status_code, 'resp' : resp,
-                   'request' : { 'http-method' : httpmeth, 'url' : url,
-                                 'jdict' : jdict }
-                 }
-            td = self.__throttlePolicy[1]
-            up = self.__throttlePolicy[2]
-            if not self.__throttlePolicy[0](self, tp, td, up):
-                break
+    #
+    # The rateLimiter (if any) hooks: _rateAdmit waits (if necessary) before
+    # each request is sent and _rateObserve tells it what the server said
+    #
+    def _rateAdmit(self):
+        if self._rateLimiter is None:
+            return
+        priority = _numerousPriority.get()
+        dt = self._rateLimiter.acquire(priority)
+        while dt > 0:
+            self.statistics.incr('rateLimiterWaits')
+            self.statistics.incr('rateLimiterDelays', dt)
+            self._throttleSleep(dt)
+            dt = self._rateLimiter.acquire(priority)
+
+    def _rateObserve(self, remaining, reset):
+        if self._rateLimiter is not None:
+            self._rateLimiter.observe(remaining, reset)
 
+    #
+    # The circuitBreaker (if any) hooks: _circuitAdmit raises the exception
+    # if the request isn't allowed and _circuitResult says how it went
+    # (False for network errors and 5xx responses). The breaker state is
+    # copied into the statistics each time.
+    #
+    def _circuitAdmit(self):
+        cb = self._circuitBreaker
+        if cb is None:
+            return
+        retryIn = cb.allow()
+        self.statistics['circuitState'] = cb.state
+        if retryIn > 0:
+            self.statistics.incr('circuitFastFails')
+            raise NumerousCircuitOpenError(retryIn)
+
+    def _circuitResult(self, ok):
+        cb = self._circuitBreaker
+        if cb is None:
+            return
+        if ok:
+            cb.success()
+        elif cb.failure():
+            self.statistics.incr('circuitOpened')
+        self.statistics.update({ 'circuitState' : cb.state,
+                                 'circuitFailures' : cb.consecutiveFailures })
 
-        # at this point we're out of the retry loop because the throttle
-        # policy returned false (i.e., no retry needed). We now have
-        # a response that should be accepted if it's one of the "good"
-        # codes (that varies by particular API) or raise an exception
-        # otherwise (e.g, Unauthorized, Not Found, etc).
+    #
+    # We now have a response that should be accepted if it's one of the
+    # "good" codes (that varies by particular API) or raise an exception
+    # otherwise (e.g, Unauthorized, Not Found, etc). Returns the decoded
+    # JSON from the (text of the) response.
+    #
+    def _finishResponse(self, api, url, status, reason, text):
 
         dflt_good = ( requests.codes.ok, )   # 200/OK for most requests
-        if resp.status_code not in api.get('success-codes', dflt_good):
+        if status not in api.get('success-codes', dflt_good):
             # didn't get a good response; figure out what exception to raise
-            reason = resp.raw.reason
-            rj = { 'error-type' : "HTTPError", 'code' : resp.status_code,
+            rj = { 'error-type' : "HTTPError", 'code' : status,
                    'reason' : reason, 'id' : url,
                    'value' : "Server returned an HTTP error: " + reason }
 
-            if resp.status_code == requests.codes.unauthorized:    # 401
-                raise NumerousAuthError(rj, resp.status_code, reason)
+            if status == requests.codes.unauthorized:    # 401
+                raise NumerousAuthError(rj, status, reason)
             else:
-                raise NumerousError(rj, resp.status_code, reason)
+                raise NumerousError(rj, status, reason)
 
         # On some APIs that return "nothing" the server returns "{}" but
         # on others it literally returns zero len data. Unfortunately
-        # resp.json() raises an exception for zero-len JSON. We don't
+        # json decoding raises an exception for zero-len JSON. We don't
         # want to generally ignore JSON decode exceptions, so one way or
         # another we have to test for this case. Thus, we test first despite
         # the general style admonition of not doing "Look Before You Leap"
         rj = {}
-        if len(resp.text) > 0:
+        if len(text) > 0:
             try:                   # only fails if server returns junk
-                rj = resp.json()
+                rj = json.loads(text)
             except ValueError:
                 # This means we've either really screwed up somehow
                 # or (more likely? less likely?) there's a server
                 # bug. In any case, we can't decipher reply...
                 # so report that
                 rj = { 'error-type' : "JSONDecode",
-                       'code' : resp.status_code,
-                       'value' : resp.text, 'id' : url,
+                       'code' : status,
+                       'value' : text, 'id' : url,
                        'reason' : "Could not decode server json" }
                 raise NumerousError(rj, rj['code'], "ValueError")
 
@@ -1442,35 +2284,872 @@ class Numerous:
 
 
 #
-# Iterator for lazy fetch of chunked NumerousApp stuff
-#  - events, streams, interactions, subscriptions, and the metrics-collection
-# When needed get the first chunk from the server and if you iterate
-# off the end of that chunk then we get the next
+# The label matching logic for metricByLabel (see there for the meaning
+# of the matchTypes; 'ID' is handled by metricByLabel itself).
 #
-# the apiOP contains the starting URL as well as (very importantly)
-# the generalized keys for the collection list itself and the next URL
-# For example, in the stream API the collection is under key 'items'
-# and the next chunk URL is 'next'. This varies for each collection type
-# but this logic is generic and is reusable. So it's a bit hard to follow
-# but refer to the __APIInfo data for any particular API specific keys
+# The metrics get fed to this one at a time; feed() returns True once the
+# answer is known (i.e., the FIRST match) so the caller can stop iterating
+# and thus not fetch any more chunks of the metrics collection.
 #
-class _Numerous_ChunkedAPIIter:
-    def __init__(self, nr, apiOP):
-        self.nr = nr
-        self.__apiOP = apiOP
+class _Numerous_LabelMatch:
+    def __init__(self, labelspec, matchType):
+        self.labelspec = labelspec
+        self.matchType = matchType
+        self.bestMatch = None
+        self.bestMatchLen = 0
 
-        # start with an empty list... the first next() will trigger
-        # the "past the end" code and fetch the "next" chunk (which
-        # in the initial case is the initial chunk)
-        self.__list = []
-        self.__nextURL = apiOP['base-url']
+        if matchType == "STRING":
+            self.rx = None
+        else:
+            self.rx = re.compile(labelspec)
 
-        # the algorithm itself doesn't really need to know this
-        # BUT... for some better error reporting and also for
-        #        some statistics (used for testing/debugging)
-        #        it's helpful to distinguish the first chunk
-        #        from any subsequent additional chunks.
-        # The code is elegant; testing and helping you find errors sucks :)
+    def feed(self, m):
+        conflictString = "More than one match"
+        bestMatch = self.bestMatch
+
+        if not self.rx:                            # i.e., STRING, no regexp
+            if m['label'] == self.labelspec:
+                if bestMatch:
+                    raise NumerousMetricConflictError((bestMatch['label'],
+                                                       m['label']),
+                                                      conflictString)
+
+                self.bestMatch = m
+        else:
+            matchx = self.rx.search(m['label'])
+            if matchx:
+                if self.matchType == "FIRST":
+                    self.bestMatch = m
+                    return True
+                elif self.matchType == "ONE" and bestMatch:
+                    raise NumerousMetricConflictError((bestMatch['label'],
+                                                       m['label']),
+                                                      conflictString)
+
+                # if this is "better" than our current best match, keep it
+                sp = matchx.span()
+                matchlen = sp[1] - sp[0]
+                if matchlen > self.bestMatchLen:
+                    self.bestMatch = m
+                    self.bestMatchLen = matchlen
+
+        return False
+
+    # the metric dictionary that matched, or None
+    def result(self):
+        return self.bestMatch
+
+
+#
+# Many _Numerous_LabelMatch at once, for metricsByLabels. Same idea: feed
+# it the metrics one at a time; feed() returns True once all the answers
+# are known. A conflict only ends the matching for that one labelspec.
+#
+class _Numerous_MultiLabelMatch:
+    def __init__(self, labelspecs, matchType):
+        self.matchers = [ _Numerous_LabelMatch(s, matchType)
+                          for s in labelspecs ]
+        self.errors = {}                   # index : conflict exception
+        self.live = set(range(len(self.matchers)))
+
+        # for STRING only the matchers for that exact label need to see
+        # any given metric (there could be the same labelspec twice)
+        self.byLabel = None
+        if matchType == "STRING":
+            self.byLabel = {}
+            for i, s in enumerate(labelspecs):
+                self.byLabel.setdefault(s, []).append(i)
+
+    def feed(self, m):
+        if self.byLabel is not None:
+            which = self.byLabel.get(m['label'], [])
+        else:
+            which = list(self.live)
+
+        for i in which:
+            if i in self.live:
+                try:
+                    if self.matchers[i].feed(m):
+                        self.live.discard(i)
+                except NumerousMetricConflictError as x:
+                    self.errors[i] = x
+                    self.live.discard(i)
+
+        return not self.live
+
+    # list of: metric dictionary, None, or conflict exception
+    def result(self):
+        return [ self.errors.get(i, mx.result())
+                 for i, mx in enumerate(self.matchers) ]
+
+
+#
+# The label index for metricByLabel (Numerous labelIndexTTL=N).
+#
+# This is just a saved copy of the metrics collection (in the same order)
+# plus a dictionary from label to metrics for the exact (STRING) lookups.
+# Numerous does the actual reading from the server and load()s it here.
+#
+class _NumerousLabelIndex:
+    def __init__(self, ttl, statistics):
+        self.ttl = ttl
+        self.statistics = statistics
+        self.__metrics = None            # id : metric dict, in server order
+        self.__byLabel = {}              # label : [ metric dicts ]
+        self.__loadedAt = 0
+        self.__lock = threading.Lock()
+
+    def expired(self):
+        return (self.__metrics is None or
+                time.time() - self.__loadedAt >= self.ttl)
+
+    # all of them, in server order
+    def metrics(self):
+        self.statistics.incr('labelIndexLookups')
+        with self.__lock:
+            return list(self.__metrics.values())
+
+    def load(self, metrics):
+        with self.__lock:
+            self.__metrics = OrderedDict((m['id'], m) for m in metrics)
+            self.__reindex()
+            self.__loadedAt = time.time()
+        self.statistics.incr('labelIndexLoads')
+
+    def __reindex(self):
+        self.__byLabel = {}
+        for m in self.__metrics.values():
+            self.__byLabel.setdefault(m['label'], []).append(m)
+
+    # the metrics that could possibly match; for STRING that's just
+    # the ones with exactly that label, otherwise (regexp) all of them
+    def candidates(self, labelspec, matchType):
+        self.statistics.incr('labelIndexLookups')
+        with self.__lock:
+            if matchType == "STRING":
+                return list(self.__byLabel.get(labelspec, []))
+            return list(self.__metrics.values())
+
+    # new metric
+    def add(self, m):
+        with self.__lock:
+            if self.__metrics is not None:
+                self.__metrics.pop(m['id'], None)
+                self.__metrics[m['id']] = m
+                self.__reindex()
+
+    # changed metric (changes only matter if the label changed)
+    def update(self, m):
+        with self.__lock:
+            if self.__metrics is not None and m['id'] in self.__metrics:
+                if self.__metrics[m['id']]['label'] != m['label']:
+                    self.__metrics[m['id']] = m
+                    self.__reindex()
+
+    def remove(self, id):
+        with self.__lock:
+            if self.__metrics is not None and id in self.__metrics:
+                del self.__metrics[id]
+                self.__reindex()
+
+
+#
+# Convert a time to the server's timestamp syntax, e.g.:
+#      2015-02-08T15:27:12.863Z
+# The server is very strict about that format (exactly 3 digits of
+# fractional seconds, etc). t should be something with a strftime
+# method (e.g., a datetime); anything else (e.g., a string already in
+# the above format) is returned as-is.
+#
+def _numerousTimestamp(t):
+    try:
+        timestr = t.strftime('%Y-%m-%dT%H:%M:%S.')
+    except AttributeError:
+        return t              # no strftime; it should be a string
+
+    try:
+        # note: we truncate, rather than round, the microseconds.
+        # If, for example, usec is 999900 (i.e, 999.9msec) then
+        # rounding could cause a cascade of carries into the other
+        # fields. So we'd really have to add 500 usec to the time
+        # object and THEN convert it.
+        # XXX consider fixing this; however, the numerous
+        #     server never returns a sub-millisecond time, so it's
+        #     hard to see how this will get us into trouble -- if
+        #     you came up with a time object independent of the
+        #     server you have no way to determine accurate
+        #     semantics down to sub-one-millisecond granularity.
+        #     Said differently: if this matters to you, convert
+        #     to string yourself and use that directly.
+        timestr += '{:03d}Z'.format(t.microsecond//1000)
+    except AttributeError:     # if there isn't even a microseconds...
+        timestr += '000Z'      # ... then obviously use 000msec
+    return timestr
+
+
+#
+# The statistics counters.
+#
+# This is just a defaultdict(int) with a lock, so that a Numerous shared
+# by multiple threads doesn't lose counts. Reading it (or setting things
+# in it, e.g., seeding 'serverResponseTimes' with an array) works the
+# same as any dictionary. Code that updates counters should use incr()
+# and friends rather than +=, which is not atomic.
+#
+class _NumerousStatistics(defaultdict):
+    def __init__(self, *args):
+        defaultdict.__init__(self, *(args or (int,)))
+        self.lock = threading.RLock()
+
+    def incr(self, k, n=1):
+        with self.lock:
+            self[k] += n
+
+    def maxof(self, k, v):
+        with self.lock:
+            if v > self[k]:
+                self[k] = v
+
+    def update(self, *args, **kwargs):
+        with self.lock:
+            defaultdict.update(self, *args, **kwargs)
+
+    # The most recent server response time. If someone has made the
+    # 'serverResponseTimes' element an array then keep the most recent N
+    # response times there, most recent first (see wiki To-Do discussion)
+    def recordTime(self, et):
+        with self.lock:
+            try:
+                times = self['serverResponseTimes']
+                times.insert(0, et)
+                times.pop()
+            except AttributeError:
+                self['serverResponseTimes'] = et
+
+
+#
+# A proactive rate limiter (Numerous rateLimiter=...)
+#
+# The server allows N (300) requests per rate window (one minute) and tells
+# us, in every response, how many requests remain and how many seconds
+# until the next window. The default throttle policy only finds that out
+# after the fact. This instead keeps a bucket of "tokens" (requests that
+# can still be made in this window) and each request has to get a token
+# before it is sent; when there are none left the request waits for the
+# next window rather than being sent and getting a 429.
+#
+# The bucket is corrected from the rate limit headers of every response,
+# so requests made by other programs using the same API key are accounted
+# for too (eventually; nothing can be done about requests we don't know
+# about yet). Requests admitted but not answered yet are counted against
+# the remaining amount the server reports, which errs on the side of
+# waiting a little sooner than strictly needed.
+#
+# At the start of each window the remaining amount is unknown until the
+# server tells us, so just one request is sent and the others wait (very
+# briefly) for its answer. Assuming some other window size would be a guess
+# and guessing high is exactly how 429s happen.
+#
+# One NumerousRateLimiter can (should) be shared by all the threads using a
+# Numerous (that happens automatically) and by all Numerous objects using
+# the same API key (give them the same one). To share it with other
+# processes too, see NumerousSharedRateLimiter.
+#
+#   margin   - extra seconds to wait past the reported reset time, because
+#              the reset time is only reported to the second
+#
+#   reserve  - for each priority (see Numerous.priority), how many of the
+#              remaining requests in a window are kept for higher priority
+#              requests. With the default, bulk requests wait for the next
+#              window once there are 30 or fewer left.
+#
+class NumerousRateLimiter:
+    def __init__(self, margin=1.0, reserve=None):
+        self.margin = margin
+        if reserve is None:
+            reserve = { 'bulk' : 30 }
+        self.reserve = reserve
+        self._lock = threading.Lock()
+        self._tokens = 1             # the first request finds things out
+        self._resetAt = None         # time.time() of next fresh window
+        self._probeAt = 0            # when that "first request" was sent
+        self._inflight = 0
+
+    # how long to wait, while a request is finding out the new rate info,
+    # before asking again; and when to give up on it ever coming back
+    _probeWait = 0.05
+    _probeTimeout = 10
+
+    # Returns 0 if the request can go ahead (and counts it). Otherwise
+    # returns how long to wait before asking again.
+    def acquire(self, priority='normal'):
+        with self._lock:
+            now = time.time()
+            if self._resetAt is not None and now >= self._resetAt:
+                self._tokens = 1             # fresh window; find out
+                self._resetAt = None
+
+            # what's left is reserved for more important requests
+            if (self._resetAt is not None and
+                    self._tokens <= self.reserve.get(priority, 0)):
+                return self._resetAt - now
+
+            if self._tokens <= 0:
+                if self._resetAt is not None:
+                    return self._resetAt - now
+                if now - self._probeAt < self._probeTimeout:
+                    return self._probeWait
+                self._tokens = 1             # lost; someone try again
+
+            if self._resetAt is None:
+                self._probeAt = now          # this one finds out
+            self._tokens -= 1
+            self._inflight += 1
+            return 0
+
+    # Every admitted request must be observed exactly once, with the rate
+    # limit info from its response (or -1, -1 if there was none)
+    def observe(self, remaining, reset):
+        with self._lock:
+            self._inflight = max(0, self._inflight - 1)
+            if remaining < 0 or reset < 0:
+                # no rate info (some errors don't have it) so if this was
+                # the request finding out, it didn't; let another one try
+                self._probeAt = 0
+                return
+
+            # Responses don't necessarily get here in the order the server
+            # sent them, so within a window only ever believe the lowest
+            # remaining count. A reset time later than the one we have
+            # (by more than the to-the-second fuzz) means a new window;
+            # earlier means a straggler from the previous window.
+            resetAt = time.time() + reset + self.margin
+            tokens = remaining - self._inflight
+            if self._resetAt is None or resetAt > self._resetAt + 2:
+                self._tokens = tokens
+                self._resetAt = resetAt
+            elif resetAt >= self._resetAt - 2:
+                self._tokens = min(self._tokens, tokens)
+
+
+#
+# A NumerousRateLimiter shared by all the processes (on one machine) that
+# use the same API key, e.g. lots of "nr" commands run from cron.
+#
+# The limiter state (tokens, reset time, etc) lives in a small file that
+# every process mmaps, and every acquire/observe happens with an exclusive
+# flock on that file. The in-flight count stays per process; that's only
+# used for making the count from the server more conservative, and it
+# can't get stuck at some wrong value if a process dies mid-request.
+#
+# Specify either the file (path) or the apiKey, in which case the file is
+# in a directory only you can use ($XDG_RUNTIME_DIR, or numerous-<uid> in
+# the temp directory) with a name derived from (a hash of) the key. The
+# file has to belong to you and can't be a symlink: otherwise someone else
+# could feed every process bad limiter state.
+#
+# Requires fcntl (i.e., not Windows).
+#
+class NumerousSharedRateLimiter(NumerousRateLimiter):
+    def __init__(self, path=None, apiKey=None, margin=1.0, reserve=None):
+        if fcntl is None:
+            raise ImportError("NumerousSharedRateLimiter requires fcntl")
+
+        NumerousRateLimiter.__init__(self, margin=margin, reserve=reserve)
+        if not path:
+            if not apiKey:
+                raise ValueError("Must specify path or apiKey")
+            h = hashlib.sha256(apiKey.encode('utf-8')).hexdigest()[:16]
+            path = os.path.join(self.__privateDir(), "numerous-rate-" + h)
+        self.path = path
+        self._lock = _NumerousSharedRateState(self, path)
+
+    # $XDG_RUNTIME_DIR (which is per user) if there is one, otherwise a
+    # directory of our own in the temp directory. If that is already there
+    # it has to be ours and nobody else's to use.
+    @staticmethod
+    def __privateDir():
+        d = os.environ.get('XDG_RUNTIME_DIR')
+        if d:
+            return d
+        d = os.path.join(tempfile.gettempdir(), "numerous-{}".format(
+                                                               os.getuid()))
+        try:
+            os.mkdir(d, 0o700)
+        except FileExistsError:
+            pass
+        st = os.lstat(d)
+        if (not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or
+                st.st_mode & 0o077):
+            raise PermissionError("{} is not a private directory".format(d))
+        return d
+
+
+# The "lock" for NumerousSharedRateLimiter. While held, the limiter's
+# attributes hold the shared state (loaded at the start, stored at the end).
+class _NumerousSharedRateState:
+    # tokens, resetAt (0 means None), probeAt
+    __layout = struct.Struct('=qdd') if fcntl else None
+
+    def __init__(self, limiter, path):
+        self.limiter = limiter
+        self.__tlock = threading.Lock()  # flock doesn't exclude threads
+        self.__fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW,
+                            0o600)
+        if os.fstat(self.__fd).st_uid != os.getuid():
+            os.close(self.__fd)
+            raise PermissionError("{} belongs to someone else".format(path))
+
+        sz = self.__layout.size
+        fcntl.flock(self.__fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self.__fd).st_size < sz:
+                os.ftruncate(self.__fd, sz)
+                os.pwrite(self.__fd, self.__layout.pack(1, 0, 0), 0)
+        finally:
+            fcntl.flock(self.__fd, fcntl.LOCK_UN)
+        self.__map = mmap.mmap(self.__fd, sz)
+
+    def __enter__(self):
+        self.__tlock.acquire()
+        fcntl.flock(self.__fd, fcntl.LOCK_EX)
+        lim = self.limiter
+        lim._tokens, resetAt, lim._probeAt = self.__layout.unpack(self.__map)
+        lim._resetAt = resetAt or None
+        return self
+
+    def __exit__(self, *ignored):
+        lim = self.limiter
+        try:
+            self.__map[:] = self.__layout.pack(lim._tokens,
+                                               lim._resetAt or 0,
+                                               lim._probeAt)
+        finally:
+            fcntl.flock(self.__fd, fcntl.LOCK_UN)
+            self.__tlock.release()
+
+#
+# How long to back off after a 429 "Too Many Requests", used by the default
+# throttle policy (see Numerous.__init__ for how to specify one).
+#
+# The server says how long until the fresh rate allocation (rate-reset) and
+# the default policy always waits at least that long; this decides how much
+# longer, and when to give up. The extra delay is "full jitter": a random
+# amount between zero and base * multiplier**attempt (capped at cap). If all
+# the threads (or processes) that got a 429 waited exactly the same amount
+# they would all hit the server again at the same moment and mostly get
+# another 429; spreading them out avoids that.
+#
+# Gives up (returns None) after maxAttempts retries, or if the retry would
+# go past maxTotal seconds since the first try (None means no such limit).
+#
+# The cap is small on purpose. Waiting out rate-reset is what actually gets
+# a fresh allocation; the extra delay is only there to spread out the herd,
+# and growing it to tens of seconds (as the fixed [0.75, 1.5, 5, 15, 45]
+# table this replaced did) mostly punishes the requests that have already
+# waited the longest. Subclass and override delay() for some other backoff.
+#
+class NumerousBackoff:
+    def __init__(self, base=0.75, multiplier=2, cap=5, maxAttempts=8,
+                 maxTotal=None, jitter=True):
+        self.base = base
+        self.multiplier = multiplier
+        self.cap = cap
+        self.maxAttempts = maxAttempts
+        self.maxTotal = maxTotal
+        self.jitter = jitter
+
+    # attempt is zero on the first try; reset is the server's rate-reset;
+    # elapsed is the time since the first try. Returns the extra delay (on
+    # top of reset), or None to stop retrying.
+    def delay(self, attempt, reset, elapsed):
+        if attempt >= self.maxAttempts:
+            return None
+        dt = min(self.cap, self.base * (self.multiplier ** attempt))
+        if self.jitter:
+            dt = random.uniform(0, dt)
+        if self.maxTotal is not None:
+            if elapsed + max(reset, 0) + dt > self.maxTotal:
+                return None
+        return dt
+
+
+#
+# Circuit breaker (Numerous circuitBreaker=...)
+#
+# When the server is down every request waits to find that out for itself
+# (which can take a long time) and everything using the Numerous piles up
+# behind that. After failures consecutive failures (network errors or 5xx
+# responses) the breaker "opens" and for coolDown seconds requests are
+# refused immediately instead. After that it is "half-open": one request
+# is allowed through to see if the server is back. If it works the breaker
+# closes again (back to normal); if it fails it opens for another coolDown.
+#
+# Like the rateLimiter, one of these can be shared by several Numerous
+# objects (e.g., everything talking to the same server).
+#
+class NumerousCircuitBreaker:
+    def __init__(self, failures=5, coolDown=30):
+        self.failures = failures
+        self.coolDown = coolDown
+        self.state = 'closed'
+        self.consecutiveFailures = 0
+        self.__openedAt = 0
+        self.__probeAt = None        # when the half-open request was sent
+        self.__lock = threading.Lock()
+
+    # Returns 0 if a request is allowed, otherwise the time until the
+    # breaker will (probably) allow one.
+    def allow(self):
+        with self.__lock:
+            if self.state == 'closed':
+                return 0
+
+            if self.state == 'open':
+                dt = self.__openedAt + self.coolDown - time.time()
+                if dt > 0:
+                    return dt
+                self.state = 'half-open'
+                self.__probeAt = None
+
+            # half-open: just the one request to find out (unless it seems
+            # to have gotten lost, in which case another one)
+            now = time.time()
+            if self.__probeAt and now - self.__probeAt < self.coolDown:
+                return self.__probeAt + self.coolDown - now
+            self.__probeAt = now
+            return 0
+
+    def success(self):
+        with self.__lock:
+            self.consecutiveFailures = 0
+            self.state = 'closed'
+
+    # returns True if this failure opened the breaker
+    def failure(self):
+        with self.__lock:
+            self.consecutiveFailures += 1
+            if self.state == 'open':
+                return False     # stragglers from before it opened
+            if (self.state == 'half-open' or
+                    self.consecutiveFailures >= self.failures):
+                self.state = 'open'
+                self.__openedAt = time.time()
+                return True
+            return False
+
+
+#
+# Adaptive concurrency for readMany/writeMany (concurrency='adaptive')
+#
+# Rather than a fixed number of requests in flight (too many and they run
+# into the rate limit, too few and the allocation goes to waste) this finds
+# the number as it goes, the same way TCP finds its window size: "additive
+# increase, multiplicative decrease". Each request that goes well (no
+# throttle delays of any kind, and a latency not way out of line with the
+# recent average) raises the limit by increase/limit, i.e., by about
+# increase per limit's worth of requests. A request that was throttled
+# (a 429, a voluntary delay, waiting for the rateLimiter, ...) or that
+# took more than latencyFactor times the average cuts the limit by the
+# decrease factor. Only one cut per "round trip": requests that were already
+# in flight when the limit was cut don't cut it again.
+#
+# The limit stays between minimum and maximum. Numerous uses its poolSize
+# as the maximum for the one it makes; you can also make your own and pass
+# it as the concurrency, e.g., to share one among several Numerous objects.
+#
+class NumerousAdaptiveConcurrency:
+    def __init__(self, initial=2, minimum=1, maximum=10, increase=1,
+                 decrease=0.5, latencyFactor=3):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latencyFactor = latencyFactor
+        self.inflight = 0
+        self.__latency = None        # moving average of good latencies
+        self.__cutAt = 0             # when the limit was last cut
+        self.__started = {}          # thread/task : when it got going
+        self.__cond = threading.Condition()
+
+    def __key(self):
+        try:
+            return asyncio.current_task()
+        except (NameError, RuntimeError):   # no asyncio or no running loop
+            return threading.get_ident()
+
+    # True (and counts it) if one more request can be in flight
+    def tryAcquire(self):
+        with self.__cond:
+            if self.inflight >= int(self.limit):
+                return False
+            self.inflight += 1
+            self.__started[self.__key()] = time.time()
+            return True
+
+    # the blocking version of tryAcquire
+    def acquire(self):
+        with self.__cond:
+            self.__cond.wait_for(self.tryAcquire)
+
+    # latency is how long the request (including any retries) took
+    # throttled is True if there was any throttle delay
+    def release(self, latency, throttled):
+        with self.__cond:
+            self.inflight -= 1
+            started = self.__started.pop(self.__key(), 0)
+            spike = (self.__latency is not None and
+                     latency > self.latencyFactor * self.__latency)
+
+            if throttled or spike:
+                if started >= self.__cutAt:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self.__cutAt = time.time()
+            else:
+                if self.__latency is None:
+                    self.__latency = latency
+                else:
+                    self.__latency = 0.9 * self.__latency + 0.1 * latency
+                self.limit = min(self.maximum,
+                                 self.limit + self.increase / self.limit)
+            self.__cond.notify_all()
+
+
+#
+# Transports: what actually sends the requests for a Numerous
+#
+# A transport has just one method:
+#
+#     request(httpmeth, url, auth, headers, data, files, timeout)
+#
+# where auth is the (user, password) tuple for basic authentication, data
+# is the (already JSON-encoded) body or None, files is the multipart
+# dictionary for photo uploads (see _prepareRequest) or None, and timeout
+# is None or a (connect, read) tuple.
+#
+# It returns something that looks enough like a requests.Response:
+# status_code, reason, headers (case-insensitive), text, and elapsed (a
+# timedelta). Failures have to be raised as requests.exceptions (Timeout
+# for timeouts, ConnectionError for most everything else) and it must be
+# safe to use from multiple threads at once.
+#
+# The default transport is requests. NumerousUrllib3Transport goes straight
+# to urllib3 (which requests uses underneath), skipping the per-request
+# work requests does for things the NumerousApp API never uses (cookies,
+# hooks, proxy settings from the environment, etc). tests/transportbench.py
+# measures the difference.
+#
+
+class NumerousRequestsTransport:
+    def __init__(self, poolSize=10):
+        # There used to be code making a fresh Session after any exception
+        # but that raced between threads and lost the keep-alive
+        # connections; the pool already throws away any connection that
+        # breaks.
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=poolSize,
+                                                pool_maxsize=poolSize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, httpmeth, url, auth, headers, data, files, timeout):
+        return self.session.request(httpmeth, url, auth=auth, data=data,
+                                    files=files, headers=headers,
+                                    timeout=timeout)
+
+
+class NumerousUrllib3Transport:
+    def __init__(self, poolSize=10):
+        self.pool = urllib3.PoolManager(maxsize=poolSize)
+        self.__authHeaders = {}
+
+        # no retries (that's all handled in _simpleAPI) but redirects are
+        # followed, just like requests does
+        self.__retries = urllib3.Retry(total=None, connect=0, read=0,
+                                       status=0, other=0, redirect=30,
+                                       raise_on_redirect=False)
+
+    # the Authorization (and Accept-Encoding) headers, made just once per auth
+    def __baseHeaders(self, auth):
+        try:
+            return self.__authHeaders[auth]
+        except KeyError:
+            h = urllib3.util.make_headers(basic_auth='{}:{}'.format(*auth),
+                                          accept_encoding=True)
+            self.__authHeaders[auth] = h
+            return h
+
+    def request(self, httpmeth, url, auth, headers, data, files, timeout):
+        hdrs = dict(self.__baseHeaders(auth))
+        hdrs.update(headers)
+        if files:
+            data, hdrs['Content-Type'] = urllib3.encode_multipart_formdata(
+                                                                       files)
+        elif isinstance(data, str):
+            data = data.encode('utf-8')
+
+        if timeout is not None:
+            timeout = urllib3.Timeout(connect=timeout[0], read=timeout[1])
+
+        t0 = time.time()
+        try:
+            r = self.pool.request(httpmeth, url, body=data, headers=hdrs,
+                                  timeout=timeout, retries=self.__retries)
+        except urllib3.exceptions.MaxRetryError as x:
+            # (a refused connection is, oddly, a ConnectTimeoutError too)
+            if (isinstance(x.reason, urllib3.exceptions.TimeoutError) and
+                not isinstance(x.reason,
+                               urllib3.exceptions.NewConnectionError)):
+                raise requests.exceptions.Timeout(x)
+            raise requests.exceptions.ConnectionError(x)
+        except urllib3.exceptions.TimeoutError as x:
+            raise requests.exceptions.Timeout(x)
+        except urllib3.exceptions.HTTPError as x:
+            raise requests.exceptions.ConnectionError(x)
+        return _NumerousUrllib3Response(r, url, time.time() - t0)
+
+
+# the requests.Response look-alike NumerousUrllib3Transport returns
+class _NumerousUrllib3Response:
+    def __init__(self, r, url, elapsed):
+        self.raw = r
+        self.status_code = r.status
+        self.reason = r.reason
+        self.headers = r.headers
+        self.url = r.geturl() or url
+        self.content = r.data
+        self.elapsed = timedelta(seconds=elapsed)
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+    def json(self):
+        return json.loads(self.text)
+
+
+#
+# The shared cache of metric attributes (Numerous cacheTTL=N).
+# Keyed by metric ID; entries expire ttl seconds after they were put
+# and the least recently used ones are evicted to stay under size entries.
+#
+class _NumerousMetricCache:
+    def __init__(self, ttl, size, statistics):
+        self.ttl = ttl
+        self.size = size
+        self.statistics = statistics
+        self.__entries = OrderedDict()     # id : (expiration, state)
+        self.__lock = threading.Lock()
+
+    # returns the cached state, or None if none (or expired)
+    def get(self, id):
+        with self.__lock:
+            try:
+                expires, v = self.__entries[id]
+            except KeyError:
+                self.statistics.incr('metricCacheMisses')
+                return None
+
+            if time.time() >= expires:
+                del self.__entries[id]
+                self.statistics.incr('metricCacheExpired')
+                return None
+
+            self.__entries.move_to_end(id)
+            self.statistics.incr('metricCacheHits')
+            return v
+
+    def put(self, id, v):
+        with self.__lock:
+            self.__entries[id] = (time.time() + self.ttl, v)
+            self.__entries.move_to_end(id)
+            while len(self.__entries) > self.size:
+                self.__entries.popitem(last=False)
+                self.statistics.incr('metricCacheEvictions')
+
+    def invalidate(self, id):
+        with self.__lock:
+            self.__entries.pop(id, None)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+    def __len__(self):
+        return len(self.__entries)
+
+#
+# Iterator for lazy fetch of chunked NumerousApp stuff
+#  - events, streams, interactions, subscriptions, and the metrics-collection
+# When needed get the first chunk from the server and if you iterate
+# off the end of that chunk then we get the next
+#
+# the apiOP contains the starting URL as well as (very importantly)
+# the generalized keys for the collection list itself and the next URL
+# For example, in the stream API the collection is under key 'items'
+# and the next chunk URL is 'next'. This varies for each collection type
+# but this logic is generic and is reusable. So it's a bit hard to follow
+# but refer to the __APIInfo data for any particular API specific keys
+#
+# Normally each chunk is fetched when you iterate past the end of the
+# previous one, so you wait for the server once per chunk. With prefetch=N
+# a background thread starts as soon as you ask for the first item and
+# follows the chunk links on its own, staying up to N chunks ahead of you.
+# Chunk errors, duplicate filtering, etc all still happen in the consumer
+# (i.e., in __next__) exactly as they do without prefetch.
+#
+# If you abandon a prefetching iterator part way through, the thread notices
+# (when the iterator is garbage collected, or if you call close()) and quits.
+#
+# With limit=N the iterator stops after N items, without requesting any
+# chunks beyond the one containing the Nth item (vs. the caller stopping
+# after N, which can cost an extra chunk request when N is on a chunk
+# boundary). The prefetch thread also stops once it has fetched N items.
+# The statistic 'chunksAvoided' counts the times this saved a request.
+#
+# since/until restrict it to the items with since <= 'updated' < until.
+# The collections are newest first, so once an item is older than since
+# the iteration is over and no more chunks are requested (that counts as
+# 'chunksAvoided' too). The server has no way to start a collection at a
+# particular time (the next URLs are opaque), so items newer than until
+# are still fetched, and skipped. What can help there is probe: a function
+# returning the newest item at or before until (i.e., event(before=until)).
+# If the first chunk is all too new, the probe is made (once) and if that
+# shows there's nothing in the range at all ('rangeEmpty') the iteration
+# is over without paging through everything older than until.
+#
+class _Numerous_ChunkedAPIIter:
+    def __init__(self, nr, apiOP, prefetch=0, limit=None,
+                 since=None, until=None, probe=None):
+        self.nr = nr
+        self.__apiOP = apiOP
+
+        # these are server timestamp strings, which compare correctly
+        self.__since = None if since is None else _numerousTimestamp(since)
+        self.__until = None if until is None else _numerousTimestamp(until)
+        self.__probe = probe
+        self.__inRange = False          # seen anything in the range yet
+
+        self.__prefetch = prefetch
+        self.__prefetchQ = None          # created when the thread starts
+        self.__prefetchStop = threading.Event()
+
+        self.__limit = limit
+        self.__nDelivered = 0
+
+        # start with an empty list... the first next() will trigger
+        # the "past the end" code and fetch the "next" chunk (which
+        # in the initial case is the initial chunk)
+        self.__list = deque()
+        self.__nextURL = apiOP['base-url']
+
+        # the algorithm itself doesn't really need to know this
+        # BUT... for some better error reporting and also for
+        #        some statistics (used for testing/debugging)
+        #        it's helpful to distinguish the first chunk
+        #        from any subsequent additional chunks.
+        # The code is elegant; testing and helping you find errors sucks :)
         self.__firstTime = True
 
         # see discussion about duplicate filtering elsewhere
@@ -1483,10 +3162,8 @@ class _Numerous_ChunkedAPIIter:
     def __iter__(self):
         return self
 
-    # XXX although py2/py3 compatibility is "discouraged", using just this
-    #     and a try/except import for httplib vs http.client I was able to
-    #     backport to py2. To be clear: this is a python3 file. But now
-    #     it happens to also work in python2.
+    # XXX left over from the python2 backport (which is gone now; this is
+    #     a python3 file). The real __next__ below replaces this one.
     def __next__(self):
         return self.__next__()
 
@@ -1532,92 +3209,1368 @@ class _Numerous_ChunkedAPIIter:
     # self.__dupfilter is None even if nr._filterDuplicates is True.
 
     def __next__(self):
+        if self._limitReached():
+            raise StopIteration()
         r = self.__getNextOne()
-
-        # "while" is misleading - it's really "if __dupfilter then while true"
-        while self.__dupfilter:
-            thisId = r[self.__apiOP['dupFilter']]
-            if thisId not in self.__dupfilter['prev']:
-                self.__dupfilter['current'][ thisId ] = 1  # only key matters
-                break
-            self.nr.statistics['duplicatesFiltered'] += 1
+        while self._isDuplicate(r) or not self._rangeCheck(r):
             r = self.__getNextOne()     # try the next one
-
+        self._delivered()
         return r
 
     def __getNextOne(self):
         try:
-            r = self.__list.pop(0)
+            return self._popItem()
+        except IndexError:
+            probe = self._takeProbe()
+            if probe:
+                try:
+                    self._probed(probe())
+                except NumerousError as x:
+                    self._probed(x)
+            apiOP, url = self._nextChunkRequest()
+
+            # try to get the next chunk
+            # It really should not fail but of course with a remote
+            # server anything is possible. Failure is treated as an
+            # error (i.e., exception); it is not a silent end-of-list
+            try:
+                v = self.__fetchChunk(apiOP, url)
+            except NumerousError as x:
+                self._chunkFailed(x)
+
+            self._chunkArrived(v)
+
+            # could STILL be nothing in list if collection started empty
+            # ALSO: collection items can get deleted on the server so
+            # it's possible we have a nextURL yet an empty result
+            try:
+                return self._popItem()
+            except IndexError:
+                raise StopIteration()
+
+    def __fetchChunk(self, apiOP, url):
+        if not self.__prefetch:
+            return self.nr._simpleAPI(apiOP, url=url)
+
+        if not self.__prefetchQ:
+            self.__prefetchQ = queue.Queue(self.__prefetch)
+            limit = self.__limit
+            if limit is not None:
+                limit = max(limit - self.__nDelivered, 0)
+            # NOTE: the thread must not reference self (see close())
+            # It runs in (a copy of) this thread's context so a deadline()
+            # or priority() applies to the chunks it fetches too.
+            args = (self.__prefetcher, self.nr, apiOP, url, limit,
+                    self.__prefetchQ, self.__prefetchStop)
+            ctx = contextvars.copy_context()
+            t = threading.Thread(target=ctx.run, args=args)
+            t.daemon = True
+            t.start()
+
+        try:
+            v = self.__prefetchQ.get_nowait()
+        except queue.Empty:
+            self.nr.statistics.incr('prefetchStalls')  # got ahead of it
+            v = self.__prefetchQ.get()
+
+        # The thread hands over exceptions in place of chunks, and quits.
+        # If the iteration is resumed (e.g., after NumerousRetryAfter) a
+        # new thread starts over from url, the chunk that failed.
+        if isinstance(v, Exception):
+            self.__prefetchQ = None
+            raise v
+
+        # None means the thread quit early because it reached the limit.
+        # That can only happen if some items were bogus duplicates;
+        # from here on just fetch the chunks directly.
+        if v is None:
+            self.__prefetch = 0
+            v = self.nr._simpleAPI(apiOP, url=url)
+        return v
+
+    # The prefetch thread. Follows the chunk links starting at url and
+    # puts the chunks into q. Stops at the end of the collection, at the
+    # first error (which is put into q for the consumer to raise), after
+    # limit items (None is put into q; see __fetchChunk), or when stop is set.
+    @staticmethod
+    def __prefetcher(nr, apiOP, url, limit, q, stop):
+        n = 0
+        while url and not stop.is_set():
+            if limit is not None and n >= limit:
+                v, url = None, None
+            else:
+                try:
+                    v = nr._simpleAPI(apiOP, url=url)
+                    url = v.get(apiOP['next'], None)
+                    n += len(v.get(apiOP['list']) or [])
+                except Exception as x:
+                    v, url = x, None
+
+            # q is bounded (that's what limits the read-ahead) so this
+            # waits for the consumer, checking periodically for stop
+            while not stop.is_set():
+                try:
+                    q.put(v, timeout=0.5)
+                    break
+                except queue.Full:
+                    pass
+
+    # Stops the prefetch thread, if any; only needed if you stop iterating
+    # before the end and don't want to wait for garbage collection to do it
+    def close(self):
+        self.__prefetchStop.set()
+
+    def __del__(self):
+        self.close()
+
+    #
+    # The rest of this is the bookkeeping for the chunks and the duplicate
+    # filter, separated from the actual fetching so that it can be shared
+    # with the async iterator (where the fetching has to be awaited).
+    #
 
+    # Next item from the current chunk. IndexError if the chunk is used up.
+    def _popItem(self):
+        try:
+            return self.__list.popleft()
         except AttributeError:
             # list can be None here, happens when server returns Null for
             # the list (which in turn happens sometimes when metrics are
             # deleted during iterating). Treated silently as end of list.
             raise StopIteration()
 
-        except IndexError:
-            apiOP = self.__apiOP
+    # Returns (apiOP, url) to fetch the next chunk, or StopIteration if
+    # there isn't any next chunk.
+    def _nextChunkRequest(self):
+        if not self.__nextURL:          # no next url was given to us
+            raise StopIteration()       # this is the normal way to end
+        return (self.__apiOP, self.__nextURL)
+
+    # always raises, translating the error from fetching a chunk
+    def _chunkFailed(self, v):
+        # errors that say when (or whether) to try again are passed on as is
+        if isinstance(v, (NumerousTimeoutError, NumerousRetryAfter,
+                          NumerousCircuitOpenError)):
+            raise v
+
+        # this is a bit hokey but if you have a totally bogus
+        # metric object this might be the first place you find
+        # out about it... so if this is the first time through
+        # report a NumerousError that might (hopefully) make
+        # more sense to you (otherwise you see "Getting next chunk"
+        # and you might have no idea what that means when in reality
+        # it meant your metric was bad)
+        if self.__firstTime:
+            if v.code == requests.codes.bad_request:
+                raise NumerousError(v, v.code, "Bad Metric")
+            else:
+                raise NumerousError(v, v.code, "Getting first item(s)")
+        raise NumerousChunkingError(v, v.code, "Getting next chunk")
 
-            if not self.__nextURL:          # no next url was given to us
-                raise StopIteration()       # this is the normal way to end
+    def _chunkArrived(self, v):
+        apiOP = self.__apiOP
 
-            # It's time to get the next chunk, so it's also time to slide
-            # over the duplicate filtering info (if we are filtering dups)
-            if self.__dupfilter:
-                self.__dupfilter['prev'] = self.__dupfilter['current']
-                self.__dupfilter['current'] = {}
+        # statistics, helpful for testing/debugging
+        if self.__firstTime:
+            self.nr.statistics.incr('first-chunks')
+            self.__firstTime = False
+        else:
+            self.nr.statistics.incr('additional-chunks')
+
+        # A new chunk, so it's time to slide over the duplicate filtering
+        # info (if we are filtering dups). This is done here, rather than
+        # when asking for the chunk, so that if getting it fails (e.g.,
+        # NumerousRetryAfter) and the iteration is resumed it isn't done
+        # twice.
+        if self.__dupfilter:
+            self.__dupfilter['prev'] = self.__dupfilter['current']
+            self.__dupfilter['current'] = {}
+
+        # each collection calls its list something different
+        # so that's why the list key is a parameter from apiOP
+        # since v comes from the server we use get() just in case
+        # (None stays None; see _popItem)
+        lst = v.get(apiOP['list'], [])
+        self.__list = None if lst is None else deque(lst)
+
+        # some of the APIs call this "next" and some "nextURL"
+        # so that's why the next key is a parameter from apiOP
+        # NOTE that at the end of the collection the server does
+        #      not include this field; that's how we know we're done
+        self.__nextURL = v.get(apiOP['next'], None)
+
+    # True if limit items have already been returned
+    def _limitReached(self):
+        if self.__limit is None or self.__nDelivered < self.__limit:
+            return False
+
+        # done. If there are more chunks that's the request we saved.
+        if self.__nextURL:
+            self.nr.statistics.incr('chunksAvoided')
+            self.__nextURL = None
+        self.close()         # the prefetch thread (if any) is done too
+        return True
+
+    # Counts an item as returned. Only once it really is: if getting it
+    # failed (e.g., NumerousRetryAfter) and the iteration is resumed, the
+    # limit still has room for it.
+    def _delivered(self):
+        self.__nDelivered += 1
+
+    # Stops the iteration; the rest of the chunks aren't needed
+    def _stopEarly(self):
+        if self.__nextURL:
+            self.nr.statistics.incr('chunksAvoided')
+            self.__nextURL = None
+        self.close()
+        raise StopIteration()
+
+    # True if r is within since/until, False if it is newer than until (so
+    # just skip it). Stops the iteration if r is older than since.
+    def _rangeCheck(self, r):
+        if self.__until is not None and r['updated'] >= self.__until:
+            return False
+        if self.__since is not None and r['updated'] < self.__since:
+            self._stopEarly()
+        self.__inRange = True
+        return True
+
+    # The probe function if it's time to make the probe (see discussion
+    # above), otherwise None. It's only made once.
+    def _takeProbe(self):
+        if (self.__firstTime or self.__inRange or
+                self.__nextURL is None):
+            return None
+        probe, self.__probe = self.__probe, None
+        return probe
+
+    # v is what the probe returned (the newest item at or before until)
+    # or the NumerousError it raised. 404 means there isn't one.
+    def _probed(self, v):
+        self.nr.statistics.incr('rangeProbes')
+        if isinstance(v, NumerousError):
+            if v.code != requests.codes.not_found:
+                raise v
+        elif self.__since is None or v['updated'] >= self.__since:
+            return                            # there is something in range
+        self.nr.statistics.incr('rangeEmpty')
+        self._stopEarly()
+
+    # True if r is one of the bogus duplicates (see discussion above)
+    def _isDuplicate(self, r):
+        if not self.__dupfilter:
+            return False
+
+        thisId = r[self.__apiOP['dupFilter']]
+        if thisId not in self.__dupfilter['prev']:
+            self.__dupfilter['current'][ thisId ] = 1  # only key matters
+            return False
+
+        self.nr.statistics.incr('duplicatesFiltered')
+        return True
 
-            # try to get the next chunk
-            # It really should not fail but of course with a remote
-            # server anything is possible. Failure is treated as an
-            # error (i.e., exception); it is not a silent end-of-list
+#
+# Async variant of the collections iterator; use with "async for"
+# All the bookkeeping is in the base class; only the fetch is different.
+#
+class _Numerous_AsyncChunkedAPIIter(_Numerous_ChunkedAPIIter):
 
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._limitReached():
+            raise StopAsyncIteration()
+        r = await self.__getNextOne()
+        while self._isDuplicate(r) or not self.__rangeCheck(r):
+            r = await self.__getNextOne()
+        self._delivered()
+        return r
+
+    def __rangeCheck(self, r):
+        try:
+            return self._rangeCheck(r)
+        except StopIteration:
+            raise StopAsyncIteration()
+
+    async def __getNextOne(self):
+        # StopIteration can't propagate out of a coroutine; translate it
+        try:
             try:
-                v = self.nr._simpleAPI(apiOP, url=self.__nextURL)
+                return self._popItem()
+            except IndexError:
+                probe = self._takeProbe()
+                if probe:
+                    try:
+                        self._probed(await probe())
+                    except NumerousError as x:
+                        self._probed(x)
+                apiOP, url = self._nextChunkRequest()
+                try:
+                    v = await self.nr._simpleAPI(apiOP, url=url)
+                except NumerousError as x:
+                    self._chunkFailed(x)
+
+                self._chunkArrived(v)
+                try:
+                    return self._popItem()
+                except IndexError:
+                    raise StopIteration()
+        except StopIteration:
+            raise StopAsyncIteration()
+
+
+#
+# A local (sqlite) copy of the events, stream items, or interactions of
+# metrics, so that long histories don't have to be read from the server
+# over and over again. Typical usage:
+#
+#     store = NumerousEventStore('events.db')
+#     store.sync(m)                    # m is a NumerousMetric
+#     for e in store.events(m, since='2015-08-01T00:00:00.000Z'):
+#         ...
+#
+# The collections come from the server newest first, so sync() iterates
+# (with the regular collections iterator) until it gets to an item it
+# already has and stops there; after the first time that's usually just
+# one chunk request. That's only right if everything older than that item
+# is in the store too, which is why each sync() is one transaction: if it
+# fails part way (network error, etc) none of it is kept and the next one
+# starts over from the newest item.
+#
+# Two things an incremental sync can't see: items deleted on the server
+# (they stay in the store) and items written with an "updated" time older
+# than the newest one already in the store (they aren't at the front of
+# the collection). sync(m, full=True) goes through the whole collection
+# and adds anything that's missing; forget(m) throws away what's stored.
+#
+# The queries return the items (dictionaries, the same as the iterators
+# give you) newest first. since/until are in the same form as the before
+# argument of NumerousMetric.event(): a datetime or a server timestamp
+# string. since is inclusive, until is exclusive.
+#
+# A NumerousEventStore can be shared by multiple threads.
+#
+class NumerousEventStore:
+    _collections = ('events', 'stream', 'interactions')
+
+    def __init__(self, path):
+        if sqlite3 is None:
+            raise ImportError("NumerousEventStore requires sqlite3")
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        with self.__lock, self.__db:
+            # The "updated" timestamps are fixed format (see
+            # _numerousTimestamp) so they sort correctly as strings.
+            self.__db.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                " collection TEXT, metricId TEXT, id TEXT,"
+                " updated TEXT, value REAL, item TEXT,"
+                " PRIMARY KEY (collection, metricId, id))")
+            self.__db.execute(
+                "CREATE INDEX IF NOT EXISTS itemsByTime ON items"
+                " (collection, metricId, updated)")
+
+    def close(self):
+        with self.__lock:
+            self.__db.close()
+
+    # metric can be a NumerousMetric or a metric ID
+    @staticmethod
+    def __metricId(metric):
+        return getattr(metric, 'id', metric)
+
+    def __collection(self, what):
+        if what not in self._collections:
+            raise ValueError("Unknown collection: {}".format(what))
+        return what
+
+    #
+    # Brings the store up to date with the server for the given collection
+    # ('events', 'stream', or 'interactions') of metric, which has to be a
+    # NumerousMetric. Returns the number of items added.
+    #
+    def sync(self, metric, what='events', full=False):
+        what = self.__collection(what)
+        mId = metric.id
+        metric.nr.statistics.incr('eventStoreSyncs')
+
+        new = []
+        seen = set()      # (in case duplicate filtering is turned off)
+        it = getattr(metric, what)()
+        try:
+            for item in it:
+                if item['id'] in seen:
+                    continue
+                seen.add(item['id'])
+                if self.__has(what, mId, item['id']):
+                    if full:
+                        continue
+                    break
+                new.append(item)
+        finally:
+            it.close()
+
+        with self.__lock, self.__db:
+            self.__db.executemany(
+                "INSERT OR REPLACE INTO items VALUES (?,?,?,?,?,?)",
+                [ self.__row(what, mId, item) for item in new ])
+
+        metric.nr.statistics.incr('eventStoreNewItems', len(new))
+        return len(new)
+
+    def __has(self, what, mId, itemId):
+        with self.__lock:
+            c = self.__db.execute(
+                "SELECT 1 FROM items"
+                " WHERE collection=? AND metricId=? AND id=?",
+                (what, mId, itemId))
+            return c.fetchone() is not None
+
+    @staticmethod
+    def __row(what, mId, item):
+        v = item.get('value')
+        if isinstance(v, bool) or not isinstance(v, (int, float)):
+            v = None
+        return (what, mId, item['id'], item.get('updated'), v,
+                json.dumps(item))
+
+    # the stored items of a collection, newest first
+    def events(self, metric, since=None, until=None, limit=None):
+        return self.items(metric, 'events', since, until, limit)
+
+    def stream(self, metric, since=None, until=None, limit=None):
+        return self.items(metric, 'stream', since, until, limit)
+
+    def interactions(self, metric, since=None, until=None, limit=None):
+        return self.items(metric, 'interactions', since, until, limit)
+
+    def items(self, metric, what='events', since=None, until=None,
+              limit=None):
+        return [ json.loads(r[0]) for r in
+                 self._select('item', metric, what, since, until, limit) ]
+
+    # the number of stored items
+    def count(self, metric, what='events', since=None, until=None):
+        return self._select('COUNT(*)', metric, what, since, until)[0][0]
+
+    # The stored events as numpy arrays; see NumerousMetric.eventsArray
+    def eventsArray(self, metric, columns=('updated', 'value'), since=None,
+                    until=None, limit=None):
+        cols = _NumerousEventColumns(columns)
+        sql = { 'updated' : 'updated', 'value' : 'value', 'id' : 'id',
+                'authorId' : "json_extract(item, '$.authorId')" }
+        names = list(columns)
+        rows = self._select(', '.join(sql[c] for c in names), metric,
+                            'events', since, until, limit)
+        for r in rows:
+            cols.add(dict(zip(names, r)))
+        return cols.result()
+
+    # The stored events as a NumerousSeries
+    def series(self, metric, since=None, until=None):
+        a = self.eventsArray(metric, since=since, until=until)
+        return NumerousSeries(a['updated'], a['value'])
+
+    # Selects cols for the stored items of a collection within since/until,
+    # newest first. Returns the list of rows.
+    def _select(self, cols, metric, what, since=None, until=None,
+                limit=None):
+        q = "SELECT {} FROM items WHERE collection=? AND metricId=?".format(
+                                                                        cols)
+        args = [ self.__collection(what), self.__metricId(metric) ]
+        if since is not None:
+            q += " AND updated >= ?"
+            args.append(_numerousTimestamp(since))
+        if until is not None:
+            q += " AND updated < ?"
+            args.append(_numerousTimestamp(until))
+        if cols != 'COUNT(*)':
+            q += " ORDER BY updated DESC, id DESC"
+        if limit is not None:
+            q += " LIMIT ?"
+            args.append(limit)
+        with self.__lock:
+            return self.__db.execute(q, args).fetchall()
+
+    # Throws away the stored items of metric (one collection, or all)
+    def forget(self, metric, what=None):
+        q = "DELETE FROM items WHERE metricId=?"
+        args = [ self.__metricId(metric) ]
+        if what is not None:
+            q += " AND collection=?"
+            args.append(self.__collection(what))
+        with self.__lock, self.__db:
+            self.__db.execute(q, args)
+
+
+#
+# Turns events into numpy arrays (columns), for eventsArray.
+#
+# The events are added one at a time (in the order the collection gives
+# them, i.e., newest first) and converted a batch at a time, so each
+# column is converted with one numpy call per batch rather than one per
+# event (in particular the timestamps are parsed by numpy). Each column
+# is an array that doubles in size when it fills up.
+#
+class _NumerousEventColumns:
+    _dtypes = { 'updated' : 'float64', 'value' : 'float64',
+                'id' : 'uint64', 'authorId' : 'uint64' }
+    _batchSize = 1000
+
+    def __init__(self, columns):
+        if numpy is None:
+            raise ImportError("eventsArray requires numpy")
+        if not columns:
+            raise ValueError("No columns")
+        for c in columns:
+            if c not in self._dtypes:
+                raise ValueError("Unknown column: {}".format(c))
+        self.__cols = { c : numpy.empty(self._batchSize, self._dtypes[c])
+                        for c in columns }
+        self.__n = 0
+        self.__batch = []
+
+    def add(self, ev):
+        self.__batch.append(ev)
+        if len(self.__batch) >= self._batchSize:
+            self.__convert()
+
+    def __convert(self):
+        b = self.__batch
+        n = self.__n
+        for c in self.__cols:
+            col = self.__cols[c]
+            if n + len(b) > len(col):
+                bigger = numpy.empty(max(2 * len(col), n + len(b)), col.dtype)
+                bigger[:n] = col[:n]
+                col = self.__cols[c] = bigger
+            col[n:n+len(b)] = self.__column(c, b)
+        self.__n += len(b)
+        self.__batch = []
+
+    @staticmethod
+    def __column(c, b):
+        if c == 'updated':
+            # e.g. 2015-08-10T02:17:13.315Z; numpy doesn't want the Z
+            t = numpy.array([ ev['updated'].rstrip('Z') for ev in b ],
+                            dtype='datetime64[ms]')
+            return t.astype('int64') / 1000.0
+        elif c == 'value':
+            return [ ev.get('value') if isinstance(ev.get('value'),
+                                                   (int, float))
+                     else numpy.nan for ev in b ]
+        else:
+            return [ int(ev.get(c) or 0) for ev in b ]
+
+    # the columns, oldest first
+    def result(self):
+        if self.__batch:
+            self.__convert()
+        n = self.__n
+        return { c : self.__cols[c][:n][::-1].copy() for c in self.__cols }
+
+
+#
+# A time series (of metric values) for analysis with numpy. Typically:
+#
+#     s = store.series(m)              # or m.series(), from the server
+#     hourly = s.diff().resample(3600, 'sum')     # ADDs per hour
+#
+# updated (float seconds since the epoch, as in eventsArray) and value
+# are numpy arrays of the same length, oldest first. Everything is done
+# with numpy operations over the whole arrays; no python loops over the
+# events. Methods return new NumerousSeries (except percentile).
+#
+# resample(seconds, how) puts the events into buckets of the given
+# number of seconds (starting at origin, default midnight UTC, 1/1/1970)
+# and returns one point per bucket: the start of the bucket and the sum,
+# mean, min, max, count, first, or last of the values in it. Empty buckets
+# are left out unless fill is given, in which case they get that value.
+#
+# rolling(seconds, how) is, for each point, the sum, mean, or count of
+# the values in the window of that many seconds ending at (and including)
+# the point.
+#
+class NumerousSeries:
+    def __init__(self, updated, value):
+        if numpy is None:
+            raise ImportError("NumerousSeries requires numpy")
+        self.updated = numpy.asarray(updated, dtype='float64')
+        self.value = numpy.asarray(value, dtype='float64')
+        if len(self.updated) != len(self.value):
+            raise ValueError("updated and value are different lengths")
+
+    def __len__(self):
+        return len(self.value)
+
+    def __repr__(self):
+        return "<NumerousSeries: {} points>".format(len(self))
+
+    # the points with since <= updated < until (seconds since the epoch)
+    def between(self, since=None, until=None):
+        lo = 0 if since is None else numpy.searchsorted(self.updated, since)
+        hi = (len(self) if until is None
+              else numpy.searchsorted(self.updated, until))
+        return NumerousSeries(self.updated[lo:hi], self.value[lo:hi])
+
+    # the change from each point to the next (e.g., the amounts added to
+    # a counter), at the time of the later point
+    def diff(self):
+        return NumerousSeries(self.updated[1:], numpy.diff(self.value))
+
+    # rate of change per second, at the time of the later point. Points at
+    # the same time as the one before them have no rate (NaN).
+    def rate(self):
+        dt = numpy.diff(self.updated)
+        dv = numpy.diff(self.value)
+        r = numpy.full(len(dv), numpy.nan)
+        numpy.divide(dv, dt, out=r, where=(dt > 0))
+        return NumerousSeries(self.updated[1:], r)
+
+    _resamplers = ('sum', 'mean', 'min', 'max', 'count', 'first', 'last')
+
+    def resample(self, seconds, how='mean', origin=0, fill=None):
+        if how not in self._resamplers:
+            raise ValueError("Unknown resample: {}".format(how))
+        t, v = self.updated, self.value
+        if not len(t):
+            return NumerousSeries([], [])
+
+        # bucket numbers are in ascending order (because t is) so each
+        # bucket is a contiguous run: starts[i] up to starts[i+1]
+        b = numpy.floor((t - origin) / seconds).astype('int64')
+        starts = numpy.concatenate(([0], numpy.flatnonzero(numpy.diff(b)) + 1))
+        counts = numpy.diff(numpy.append(starts, len(t)))
+
+        if how == 'count':
+            r = counts.astype('float64')
+        elif how == 'first':
+            r = v[starts]
+        elif how == 'last':
+            r = v[starts + counts - 1]
+        elif how == 'min':
+            r = numpy.minimum.reduceat(v, starts)
+        elif how == 'max':
+            r = numpy.maximum.reduceat(v, starts)
+        else:
+            r = numpy.add.reduceat(v, starts)
+            if how == 'mean':
+                r = r / counts
+
+        buckets = b[starts]
+        if fill is not None:
+            allb = numpy.arange(buckets[0], buckets[-1] + 1)
+            filled = numpy.full(len(allb), fill, dtype='float64')
+            filled[buckets - buckets[0]] = r
+            buckets, r = allb, filled
+        return NumerousSeries(origin + buckets * seconds, r)
+
+    _rollers = ('sum', 'mean', 'count')
+
+    def rolling(self, seconds, how='mean'):
+        if how not in self._rollers:
+            raise ValueError("Unknown rolling: {}".format(how))
+        t, v = self.updated, self.value
+
+        # window i is (t[i] - seconds, t[i]]: from the first point after
+        # t[i] - seconds through the last point at t[i]
+        lo = numpy.searchsorted(t, t - seconds, side='right')
+        hi = numpy.searchsorted(t, t, side='right')
+        counts = (hi - lo).astype('float64')
+        if how == 'count':
+            return NumerousSeries(t, counts)
+
+        csum = numpy.concatenate(([0.0], numpy.cumsum(v)))
+        sums = csum[hi] - csum[lo]
+        if how == 'mean':
+            sums = sums / counts
+        return NumerousSeries(t, sums)
+
+    # percentile(s) of the values; q is a number (0-100) or a list of them
+    def percentile(self, q):
+        return numpy.percentile(self.value, q)
+
+
+# #########################################
+# AsyncNumerous and AsyncNumerousMetric
+# #########################################
+#
+# asyncio versions of Numerous and NumerousMetric, so that one event loop
+# can have many (hundreds of) requests in flight at once. Every method that
+# talks to the server is a coroutine, and the collections are iterated
+# with "async for":
+#
+#     async def main():
+#         async with AsyncNumerous() as nr:
+#             m = nr.metric('9208972516053673667')
+#             print(await m.read())
+#             async for ev in m.events():
+#                 print(ev)
+#
+# These require the aiohttp library ("pip install aiohttp"); nothing else
+# in this file does.
+#
+# The endpoint tables (the __APIInfo dictionaries) and _makeAPIcontext are
+# the very same ones used by Numerous and NumerousMetric, as is all the
+# response processing; only the actual sending of requests is different.
+#
+# The throttle policy chain works the same way too, including custom
+# throttle functions. The delays of the default throttle policy happen
+# via asyncio.sleep so a throttled request never blocks other requests in
+# flight. A custom throttle function that calls time.sleep itself WILL
+# block the whole event loop; call nr._throttleSleep(dt) instead.
+#
 
-                # statistics, helpful for testing/debugging
-                if self.__firstTime:
-                    self.nr.statistics['first-chunks'] += 1
-                    self.__firstTime = False
+class AsyncNumerous(Numerous):
+
+    __APIInfo = Numerous._Numerous__APIInfo     # same endpoint tables
+
+    # poolSize here is the maximum number of simultaneous connections
+    def __init__(self, apiKey=None, server='api.numerousapp.com',
+                               throttle=None,
+                               throttleData=None,
+                               poolSize=100,
+                               cacheTTL=None,
+                               cacheSize=1000,
+                               labelIndexTTL=None,
+                               rateLimiter=None,
+                               getRetries=0,
+                               hedgePercentile=None,
+                               circuitBreaker=None,
+                               timeout=None,
+                               blocking=True):
+        if aiohttp is None:
+            raise ImportError("AsyncNumerous requires the aiohttp library")
+
+        Numerous.__init__(self, apiKey=apiKey, server=server,
+                          throttle=throttle, throttleData=throttleData,
+                          poolSize=poolSize, cacheTTL=cacheTTL,
+                          cacheSize=cacheSize, labelIndexTTL=labelIndexTTL,
+                          rateLimiter=rateLimiter, getRetries=getRetries,
+                          hedgePercentile=hedgePercentile,
+                          circuitBreaker=circuitBreaker, timeout=timeout,
+                          blocking=blocking)
+        self.__poolSize = poolSize
+        self.__aioSession = None
+        self.__throttleDelay = 0
+
+    # the requests go through aiohttp (see __getSession), not a transport
+    def _makeTransport(self, transport, poolSize):
+        return None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *ignored):
+        await self.close()
+
+    # closes the underlying connections. The object can still be used
+    # after this (new connections will be made as needed).
+    async def close(self):
+        if self.__aioSession:
+            await self.__aioSession.close()
+            self.__aioSession = None
+
+    # the aiohttp session has to be made while the event loop is running
+    # so it is made the first time it's needed rather than in __init__
+    def __getSession(self):
+        if not self.__aioSession:
+            conn = aiohttp.TCPConnector(limit=self.__poolSize)
+            # the same basic auth header requests makes from authTuple
+            # (aiohttp.BasicAuth is deprecated)
+            creds = "{}:{}".format(*self.authTuple).encode('latin-1')
+            auth = "Basic " + base64.b64encode(creds).decode('ascii')
+            self.__aioSession = aiohttp.ClientSession(
+                             connector=conn, headers={ 'Authorization' : auth })
+        return self.__aioSession
+
+    # see _simpleAPI for how this delay gets done
+    def _throttleSleep(self, dt, after=False):
+        self._noteThrottled()
+        if not self._blocking:
+            self._noWait(dt, after)
+            return
+        total = self.__throttleDelay + dt
+        if after:
+            total = max(self._deadlineClip(total), self.__throttleDelay)
+        else:
+            self._deadlineCheck(total)
+        self.__throttleDelay = total
+
+    # the rest of the waiting (retries, the rateLimiter) comes here
+    async def __wait(self, dt):
+        self._noteThrottled()
+        if not self._blocking:
+            self._noWait(dt)
+        self._deadlineCheck(dt)
+        await asyncio.sleep(dt)
+
+    # the request timeouts in aiohttp form (None: the session's default)
+    def __clientTimeout(self):
+        tmo = self._requestTimeout()
+        if tmo is None:
+            return None
+        total = None
+        t = _numerousDeadline.get()
+        if t is not None:
+            total = max(t - time.time(), 0.001)
+        return aiohttp.ClientTimeout(sock_connect=tmo[0], sock_read=tmo[1],
+                                     total=total)
+
+    async def _simpleAPI(self, api, jdict=None, multipart=None, url=None):
+
+        self.statistics.incr('simpleAPI')
+        httpmeth, url, hdrs, data = self._prepareRequest(api, jdict,
+                                                         multipart, url)
+        session = self.__getSession()
+
+        started = time.time()
+        retried = 0
+        for attempt in range(self._arbitraryMaximumTries):
+
+            # aiohttp form data can't be sent twice; make it every time
+            if multipart:
+                data = aiohttp.FormData()
+                for k in multipart:
+                    fname, fdata, mtype = multipart[k]
+                    data.add_field(k, fdata, filename=fname,
+                                   content_type=mtype)
+
+            self._deadlineCheck()
+            self._notBeforeCheck()
+            self._circuitAdmit()
+            await self._rateAdmit()
+            self.statistics.incr('serverRequests')
+
+            try:
+                tmo = self.__clientTimeout()
+                hedgeAfter = self._hedgeAfter(httpmeth)
+                if hedgeAfter is None:
+                    resp, text, et = await self.__fetch(session, httpmeth,
+                                                        url, data, hdrs, tmo)
                 else:
-                    self.nr.statistics['additional-chunks'] += 1
-
-            except NumerousError as v:
-                # this is a bit hokey but if you have a totally bogus
-                # metric object this might be the first place you find
-                # out about it... so if this is the first time through
-                # report a NumerousError that might (hopefully) make
-                # more sense to you (otherwise you see "Getting next chunk"
-                # and you might have no idea what that means when in reality
-                # it meant your metric was bad)
-                if self.__firstTime:
-                    if v.code == requests.codes.bad_request:
-                        raise NumerousError(v, v.code, "Bad Metric")
-                    else:
-                        raise NumerousError(v, v.code, "Getting first item(s)")
-                raise NumerousChunkingError(v, v.code, "Getting next chunk")
-
-            # each collection calls its list something different
-            # so that's why the list key is a parameter from apiOP
-            # since v comes from the server we use get() just in case
-            self.__list = v.get(apiOP['list'], [])
-
-            # some of the APIs call this "next" and some "nextURL"
-            # so that's why the next key is a parameter from apiOP
-            # NOTE that at the end of the collection the server does
-            #      not include this field; that's how we know we're done
-            self.__nextURL = v.get(apiOP['next'], None)
+                    resp, text, et = await self.__fetchHedged(session, url,
+                                                              hdrs, hedgeAfter,
+                                                              tmo)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as x:
+                self._rateObserve(-1, -1)
+                self._circuitResult(False)
+                dt = self._getRetryDelay(httpmeth, retried, attempt)
+                if dt is None:
+                    if isinstance(x, asyncio.TimeoutError):
+                        raise NumerousTimeoutError(x)
+                    raise NumerousNetworkError(x)
+                retried += 1
+                await self.__wait(dt)
+                continue
+            except BaseException:
+                # cancelled (e.g., asyncio.wait_for) or anything else:
+                # no response, but still not in flight any more
+                self._rateObserve(-1, -1)
+                raise
 
-            # could STILL be nothing in list if collection started empty
-            # ALSO: collection items can get deleted on the server so
-            # it's possible we have a nextURL yet an empty result
+            self.statistics.recordTime(et)
+            self._circuitResult(resp.status < 500)
+
+            # The throttle policy "sleeps" by calling _throttleSleep which
+            # just adds up the delay. There is no await between resetting
+            # it here and picking it up afterwards, so this can't get mixed
+            # up with the delays of other requests in flight.
+            self.__throttleDelay = 0
+            retry = self._throttle(attempt, resp.status, resp.headers, resp,
+                                   httpmeth, url, jdict, started)
+            dt = self.__throttleDelay
+            self.__throttleDelay = 0
+            if dt > 0:
+                await asyncio.sleep(dt)
+
+            if retry:
+                continue
+
+            # the throttle policy didn't want a retry but a 5xx GET might
+            dt = None
+            if resp.status >= 500:
+                dt = self._getRetryDelay(httpmeth, retried, attempt)
+            if dt is None:
+                break
+            retried += 1
+            await self.__wait(dt)
+
+        return self._finishResponse(api, url, resp.status, resp.reason, text)
+
+    # Sends one request; returns the response, its text, and elapsed time
+    async def __fetch(self, session, httpmeth, url, data, hdrs, timeout):
+        kw = {} if timeout is None else { 'timeout' : timeout }
+        t0 = time.time()
+        async with session.request(httpmeth, url, data=data, headers=hdrs,
+                                   **kw) as resp:
+            text = (await resp.read()).decode('utf-8', 'replace')
+        et = time.time() - t0
+        if httpmeth == 'GET':
+            self._getTimes.append(et)
+        return resp, text, et
+
+    # same as Numerous.__sendHedged but with tasks instead of threads
+    async def __fetchHedged(self, session, url, hdrs, hedgeAfter, timeout):
+        fetch = lambda: asyncio.ensure_future(
+                      self.__fetch(session, 'GET', url, None, hdrs, timeout))
+        first = fetch()
+        try:
+            done, pending = await asyncio.wait([first], timeout=hedgeAfter)
+        except BaseException:
+            first.cancel()
+            raise
+        if done or not self._hedgeAdmit():
+            return await first
+
+        self.statistics.incr('hedgeRequests')
+        pending = { first, fetch() }
+        loser = lambda f: self._hedgeLoser(f, lambda: f.result()[0])
+        finished = []
+        try:
+            while pending and not self._hedgeWinner(finished):
+                done, pending = await asyncio.wait(
+                                pending, return_when=asyncio.FIRST_COMPLETED)
+                finished.extend(done)
+        except BaseException:
+            # cancelled; the caller observes one of them, the rest are
+            # done here (when they finish being cancelled)
+            for f in pending:
+                f.cancel()
+            for f in (finished + list(pending))[1:]:
+                f.add_done_callback(loser)
+            raise
+
+        f = self._hedgeWinner(finished) or finished[0]
+        for other in finished + list(pending):
+            if other is not f:
+                other.add_done_callback(loser)
+        if f is not first and f.exception() is None:
+            self.statistics.incr('hedgeWins')
+        return f.result()
+
+    # same as Numerous._rateAdmit but the waiting is awaited
+    async def _rateAdmit(self):
+        if self._rateLimiter is None:
+            return
+        priority = _numerousPriority.get()
+        dt = self._rateLimiter.acquire(priority)
+        while dt > 0:
+            self.statistics.incr('rateLimiterWaits')
+            self.statistics.incr('rateLimiterDelays', dt)
+            await self.__wait(dt)
+            dt = self._rateLimiter.acquire(priority)
+
+    async def _getRedirect(self, url):
+        async with self.__getSession().get(url) as r:
+            return str(r.url)
+
+    # --- the Numerous methods, as coroutines where needed
+
+    def metric(self, metricId):
+       return AsyncNumerousMetric(metricId, self)
+
+    async def metricByLabel(self, labelspec, matchType='FIRST'):
+
+        if not matchType:
+            matchType = "FIRST"
+        if matchType not in [ "FIRST", "BEST", "ONE", "STRING", "ID" ]:
+            raise ValueError(matchType)
+        if matchType == "ID":
+            rv = self.metric(labelspec)
+            if not await rv.validate():
+                rv = None
+            return rv
+
+        matcher = _Numerous_LabelMatch(labelspec, matchType)
+        idx = self._labelIndex
+        if idx is None:
+            async for m in self.metrics():
+                if matcher.feed(m):
+                    break
+        else:
+            if idx.expired():
+                await self.refreshLabelIndex()
+            for m in idx.candidates(labelspec, matchType):
+                if matcher.feed(m):
+                    break
 
+        rv = None
+        bestMatch = matcher.result()
+        if bestMatch:
+            rv = self.metric(bestMatch['id'])
+
+        return rv
+
+    # async iterator
+    def metrics(self, userId=None, limit=None):
+        info = self.__APIInfo['metrics-collection']
+        api = self._makeAPIcontext(info, 'GET', userId=userId)
+        return _Numerous_AsyncChunkedAPIIter(self, api, limit=limit)
+
+    async def user(self, userId=None):
+        info = self.__APIInfo['user']
+        api = self._makeAPIcontext(info, 'GET', userId=userId)
+        return await self._simpleAPI(api)
+
+    async def userPhoto(self, imageDataOrOpenFile, mimeType="image/jpeg"):
+        info = self.__APIInfo['user']
+        api = self._makeAPIcontext(info, 'photo')
+        mpart = { 'image' : ( 'image.img', imageDataOrOpenFile, mimeType) }
+        return await self._simpleAPI(api, multipart=mpart)
+
+    # async iterator
+    def subscriptions(self, userId=None, limit=None):
+        info = self.__APIInfo['subscriptions']
+        api = self._makeAPIcontext(info, 'GET', userId=userId)
+        return _Numerous_AsyncChunkedAPIIter(self, api, limit=limit)
+
+    async def mostPopular(self, count=None):
+        info = self.__APIInfo['popular']
+        api = self._makeAPIcontext(info, 'GET', count=count)
+        return await self._simpleAPI(api)
+
+    async def ping(self):
+        ignored = await self.user()
+        return True      # errors throw exceptions
+
+    async def ensureBudget(self, n, maxAge=5):
+        if not self._budgetKnown(maxAge):
+            await self.ping()
+        dt = self._budgetWait(n)
+        if dt > 0:
+            await self.__wait(dt)
+        return dt
+
+    async def createMetric(self, label, value=None, attrs={}):
+        api = self._makeAPIcontext(self.__APIInfo['create'], 'POST')
+
+        j = attrs.copy()
+        j['label'] = label
+        if value:
+            j['value'] = value
+        v = await self._simpleAPI(api, jdict=j)
+        if self._labelIndex is not None:
+            self._labelIndex.add(v)
+        return self.metric(v['id'])
+
+    async def metricsByLabels(self, labelspecs, matchType='FIRST'):
+        labelspecs = list(labelspecs)
+        if not matchType:
+            matchType = "FIRST"
+        if matchType not in [ "FIRST", "BEST", "ONE", "STRING", "ID" ]:
+            raise ValueError(matchType)
+        if matchType == "ID":
+            ms = await self.readMany(labelspecs)
+            return self._validatedResults(labelspecs, ms)
+
+        matcher = _Numerous_MultiLabelMatch(labelspecs, matchType)
+        idx = self._labelIndex
+        if idx is None:
+            async for m in self.metrics():
+                if matcher.feed(m):
+                    break
+        else:
+            if idx.expired():
+                await self.refreshLabelIndex()
+            for m in idx.metrics():
+                if matcher.feed(m):
+                    break
+
+        return [ self.metric(r['id']) if isinstance(r, dict) else r
+                 for r in matcher.result() ]
+
+    async def refreshLabelIndex(self):
+        if self._labelIndex is not None:
+            self._labelIndex.load([ m async for m in self.metrics() ])
+
+    async def readMany(self, ids, concurrency=None):
+        ms = self._uniqueMetrics(ids)
+        rslts = await self._fanOut(lambda m: m.read(), ms.values(),
+                                   concurrency)
+        return self._manyResults(ms, rslts)
+
+    async def writeMany(self, values, concurrency=None):
+        work = self._writeManyWork(values)
+        rslts = await self._fanOut(lambda w: w[1].write(**w[2]), work,
+                                   concurrency)
+        return { w[0] : r for w, r in zip(work, rslts) }
+
+    # same idea as Numerous._fanOut (including returning, not raising,
+    # each item's exception) but with tasks instead of threads;
+    # concurrency defaults to the connection limit (poolSize)
+    async def _fanOut(self, func, items, concurrency=None):
+        items = list(items)
+        adaptive = self._adaptiveConcurrency(concurrency)
+        if adaptive:
+            concurrency = adaptive.maximum
+        elif not concurrency:
+            concurrency = self.__poolSize
+        concurrency = max(1, min(concurrency, len(items)))
+        sem = asyncio.Semaphore(concurrency)
+
+        async def oneItem(x):
+            async with sem:
+                try:
+                    return await func(x)
+                except Exception as e:
+                    return e
+
+        # the adaptive limit is on top of the semaphore; the condition is
+        # for waiting until the limit lets another one go
+        cond = asyncio.Condition()
+
+        async def adaptiveItem(x):
+            async with cond:
+                await cond.wait_for(adaptive.tryAcquire)
+            t0 = time.time()
+            throttled = [False]
+            _numerousThrottled.set(throttled)   # (each task has a copy)
             try:
-                r = self.__list.pop(0)
-            except (IndexError, AttributeError):
-                raise StopIteration()
+                return await oneItem(x)
+            finally:
+                adaptive.release(time.time() - t0, throttled[0])
+                self.statistics['adaptiveLimit'] = adaptive.limit
+                async with cond:
+                    cond.notify_all()
 
-        return r
+        self.statistics.incr('fanOutItems', len(items))
+        self.statistics.maxof('fanOutMaxThreads', concurrency)
+        f = adaptiveItem if adaptive else oneItem
+        return await asyncio.gather(*[ f(x) for x in items ])
+
+
+#
+# See AsyncNumerous. Same as NumerousMetric except the methods that talk to
+# the server are coroutines and the collections are async iterators.
+#
+# The m[key] style access can't contact the server (it isn't a coroutine)
+# so it only works on the cached state from the most recent read() (or
+# update(), etc). If there is no cached state you get a NumerousError.
+#
+class AsyncNumerousMetric(NumerousMetric):
+
+    __APIInfo = NumerousMetric._NumerousMetric__APIInfo  # same endpoint tables
+    __cachedState = NumerousMetric._NumerousMetric__cachedState  # ditto cache
+
+    def __init__(self, id, numerous=None):
+        if not numerous:
+            numerous = AsyncNumerous()
+        NumerousMetric.__init__(self, id, numerous)
+
+    def __cache(self):
+        v = self.__cachedState
+        if not v:
+            raise NumerousError({ 'id' : self.id }, -1,
+                                "No cached state; use read() first")
+        return v
+
+    def __getitem__(self, key):
+        return self.__cache()[key]
+
+    def __contains__(self, key):
+        return key in self.__cache()
+
+    def __iter__(self):
+        return self.__cache().__iter__()
+
+    # never contacts the server (see above); shows cached state if any
+    def __str__(self):
+        rslt = "<{} @ {}: ".format(self.__class__.__name__, hex(id(self)))
+        v = self.__cachedState
+        if v:
+            rslt += "'{0[label]}' [{0[id]}] = {0[value]}".format(v)
+        else:
+            rslt += "[{}] (not read yet)".format(self.id)
+        return rslt + ">"
+
+    def __getAPI(self, what, whichOp, **kwargs):
+        info = self.__APIInfo[what]
+        id = self.id
+        return self.nr._makeAPIcontext(info, whichOp, metricId=id, **kwargs)
+
+    async def read(self, dictionary=False):
+        api = self.__getAPI('metric', 'GET')
+        v = await self.nr._simpleAPI(api)
+        self.__cachedState = v
+        return v.copy() if dictionary else v['value']
+
+    async def validate(self):
+        try:
+            ignored = await self.read()
+            return True
+        except NumerousError as v:
+            if v.code in (requests.codes.bad_request,requests.codes.not_found):
+                return False
+            else:
+                raise
+
+    def __collections(self, what, limit=None, **kw):
+        api = self.__getAPI(what, 'GET')
+        return _Numerous_AsyncChunkedAPIIter(self.nr, api, limit=limit, **kw)
+
+    # async iterators -- typical usage: async for event in metric.events():
+    def events(self, limit=None, since=None, until=None):
+        return self.__collections('events', limit,
+                                  **self._eventsRange(since, until))
+
+    # see NumerousMetric.eventsArray
+    async def eventsArray(self, columns=('updated', 'value'), since=None,
+                          until=None, limit=None):
+        cols = _NumerousEventColumns(columns)
+        async for ev in self.events(limit=limit, since=since, until=until):
+            cols.add(ev)
+        return cols.result()
+
+    async def series(self, since=None, until=None):
+        a = await self.eventsArray(since=since, until=until)
+        return NumerousSeries(a['updated'], a['value'])
+
+    def stream(self, limit=None):
+        return self.__collections('stream', limit)
+
+    def interactions(self, limit=None):
+        return self.__collections('interactions', limit)
+
+    def permissions(self, limit=None):
+        return self.__collections('permissions-collection', limit)
+
+    def subscriptions(self, limit=None):
+        return self.__collections('subscriptions', limit)
+
+    async def get_permission(self, userId=None):
+        api = self.__getAPI('permission', 'GET', userId=userId)
+        return await self.nr._simpleAPI(api)
+
+    async def set_permission(self, perms, userId=None):
+        if (not userId) and ('userId' in perms):
+            userId = perms['userId']
+        api = self.__getAPI('permission', 'PUT', userId=userId)
+        return await self.nr._simpleAPI(api, jdict=perms)
+
+    async def delete_permission(self, userId):
+        api = self.__getAPI('permission', 'DELETE', userId=userId)
+        await self.nr._simpleAPI(api)
+
+    async def subscription(self, userId=None):
+        api = self.__getAPI('subscription', 'GET', userId=userId)
+        return await self.nr._simpleAPI(api)
+
+    async def subscribe(self, dict, userId=None, overwriteAll=False):
+        if overwriteAll:
+            params = {}
+        else:
+            params = await self.subscription(userId)
+
+        for k in dict:
+            params[k] = dict[k]
+
+        self.__cachedState = None    # bcs subscriptions count changes
+        api = self.__getAPI('subscription', 'PUT', userId=userId)
+        return await self.nr._simpleAPI(api, jdict=params)
+
+    async def write(self, newval, onlyIf=False, add=False, dictionary=False,
+                    updated=None):
+        j = self._writeParams(newval, onlyIf, add, updated)
+
+        self.__cachedState = None  # will need to refresh cache
+        api = self.__getAPI('events', 'POST')
+        try:
+            v = await self.nr._simpleAPI(api, jdict=j)
+        except NumerousError as x:
+            v = self._writeError(x, newval, onlyIf)
+
+        return v if dictionary else v['value']
+
+    async def update(self, dict, overwriteAll=False):
+        if overwriteAll:
+            newParams = {}
+        else:
+            newParams = (self.__cachedState or
+                         await self.read(dictionary=True)).copy()
+        newParams.update(dict)
+
+        api = self.__getAPI('metric', 'PUT')
+        v = await self.nr._simpleAPI(api, jdict=newParams)
+        self.__cachedState = v
+        if self.nr._labelIndex is not None:
+            self.nr._labelIndex.update(v)     # in case label changed
+        return v.copy()
+
+    async def __writeInteraction(self, dict):
+        api = self.__getAPI('interactions', 'POST')
+        v = await self.nr._simpleAPI(api, jdict=dict)
+        return v['id']
+
+    async def like(self):
+        return await self.__writeInteraction({ 'kind' : 'like' })
+
+    async def sendError(self, errText):
+        j = { 'kind' : 'error' , 'commentBody' : errText }
+        return await self.__writeInteraction(j)
+
+    async def comment(self, ctext):
+        j = { 'kind' : 'comment' , 'commentBody' : ctext }
+        return await self.__writeInteraction(j)
+
+    async def photo(self, imageDataOrOpenFile, mimeType="image/jpeg"):
+        api = self.__getAPI('photo', 'POST')
+        mpart = { 'image' : ( 'image.img', imageDataOrOpenFile, mimeType) }
+        v = await self.nr._simpleAPI(api, multipart=mpart)
+        self.__cachedState = v
+        return v.copy()
+
+    async def photoDelete(self):
+        self.__cachedState = None
+        api = self.__getAPI('photo', 'DELETE')
+        await self.nr._simpleAPI(api)
+
+    async def event(self, evID=None, before=None):
+        if evID and before:
+            raise ValueError("Cannot specify both evID and before")
+        elif evID:
+            api = self.__getAPI('event', 'GET', eventID=evID)
+        else:
+            timestr = _numerousTimestamp(before)
+            api = self.__getAPI('events', 'at', timestr=timestr)
+
+        return await self.nr._simpleAPI(api)
+
+    async def eventDelete(self, evID):
+        api = self.__getAPI('event', 'DELETE', eventID=evID)
+        await self.nr._simpleAPI(api)
+
+    async def interaction(self, interID):
+        api = self.__getAPI('interaction', 'GET', item=interID)
+        return await self.nr._simpleAPI(api)
+
+    async def interactionDelete(self, interID):
+        api = self.__getAPI('interaction', 'DELETE', item=interID)
+        await self.nr._simpleAPI(api)
+
+    # these read the metric (if not already cached)
+    async def label(self):
+        v = self.__cachedState or await self.read(dictionary=True)
+        return v['label']
+
+    async def webURL(self):
+        v = self.__cachedState or await self.read(dictionary=True)
+        return v['links']['web']
+
+    async def photoURL(self):
+        v = await self.read(dictionary=True)
+        if 'photoURL' in v:
+            return await self.nr._getRedirect(v['photoURL'])
+        return None
+
+    async def crushKillDestroy(self):
+        self.__cachedState = None
+        api = self.__getAPI('metric', 'DELETE')
+        await self.nr._simpleAPI(api)
+        if self.nr._labelIndex is not None:
+            self.nr._labelIndex.remove(self.id)
 
 #
 # EXCEPTIONS
@@ -1647,6 +4600,21 @@ class _Numerous_ChunkedAPIIter:
 #         gobbledygook). In this case the details attribute will contain
 #         the underlying exception info.
 #
+#    NumerousTimeoutError
+#       - (a NumerousNetworkError) a request timed out (see the Numerous
+#         timeout argument), or there wasn't enough time left before the
+#         deadline (see Numerous.deadline) to even try
+#
+#    NumerousRetryAfter
+#       - only in non-blocking mode (Numerous blocking=False): the request
+#         can't be made (or retried) for retryAfter seconds. Nothing was
+#         changed at the server; try it again after that.
+#
+#    NumerousCircuitOpenError
+#       - (a NumerousNetworkError) the circuitBreaker has decided the server
+#         is down and didn't even try. details['retry-in'] is how long
+#         (seconds) until it will try again.
+#
 
 class NumerousError(Exception):
     def __init__(self, v, code, reason):
@@ -1660,6 +4628,24 @@ class NumerousNetworkError(NumerousError):
         self.reason = "Network Error"
         self.details = { 'requests-exception' : x }
 
+class NumerousTimeoutError(NumerousNetworkError):
+    def __init__(self, x):
+        NumerousNetworkError.__init__(self, x)
+        self.reason = "Timeout"
+
+class NumerousCircuitOpenError(NumerousNetworkError):
+    def __init__(self, retryIn):
+        self.code = -1
+        self.reason = "Circuit Open"
+        self.details = { 'retry-in' : retryIn }
+
+class NumerousRetryAfter(NumerousError):
+    def __init__(self, retryAfter):
+        self.code = requests.codes.too_many_requests    # (429)
+        self.reason = "Retry After"
+        self.retryAfter = retryAfter
+        self.details = { 'retry-after' : retryAfter }
+
 class NumerousMetricConflictError(NumerousError):
     def __init__(self, v, reason):
         self.code = requests.codes.conflict    # it's always this (409)
@@ -18,6 +18,7 @@ from numerous import Numerous, numerousKey, \
 #              [ --ensurerate ]
 #              [ --statistics ]
 #              [ --requestlog ]
+#              [ --sharedlimit ]
 #              [ -R ]
 #
 #
@@ -286,6 +287,10 @@ from numerous import Numerous, numerousKey, \
 # OTHER OPTIONS
 #   --statistics will display various statistics at the end
 #   --requestlog will display a log of all the requests made to the server
+#   --sharedlimit shares the API rate limit with every other nr (or any
+#                 program using NumerousSharedRateLimiter) using the same
+#                 API key, so that many of them run at once (e.g., from
+#                 cron) don't all run into "Too Many Requests" together
 #
 # Examples:
 #
@@ -403,6 +408,7 @@ parser.add_argument('-U', '--user', action="store_true")
 parser.add_argument('--statistics', action="store_true", help="show statistics from numerous class")
 parser.add_argument('-R', '--ratelimits', action="count", default=0, help="display rate limit info. Use -RR to ONLY do that (no other processing)")
 parser.add_argument('--ensurerate', type=int, default=0, help="delay if necessary for sufficient API rate limit.")     # use with -R
+parser.add_argument('--sharedlimit', action="store_true", help="share the API rate limit with other processes using the same key")
 
 argx=parser.add_mutually_exclusive_group()
 # these are mutually exclusive because both use throttle overrides
@@ -524,8 +530,9 @@ if args.plus:
 
 #
 # limit of -1 means infinite and I think it's cleaner to use None in code
+# (zero or any other negative number has always meant infinite too)
 #
-if args.limit == -1:
+if args.limit <= 0:
     args.limit = None
 
 #
@@ -603,18 +610,16 @@ if args.ratelimits > 0 or args.ensurerate > 0:
 
 
     if args.ensurerate:
-        t = refresh + 1             # +1 is a just-to-be-sure thing
         if remain >= args.ensurerate:
             msg = "No delay needed; have {} operations left.".format(remain)
-            t = 0
         else:
-            msg = "Delaying {} seconds; only have {} APIs left.".format(t, remain)
+            msg = "Delaying {} seconds; only have {} APIs left.".format(refresh + 1, remain)
 
         if not bequiet:
             print(msg)
 
-        if t > 0:
-            time.sleep(t)
+        # uses the rate info from the ping just done
+        nrRaw.ensureBudget(args.ensurerate)
 
     elif not bequiet:
         print(("Remaining APIs: {}. New allocation in {} seconds.".format(remain,refresh)))
@@ -650,7 +655,8 @@ elif args.requestlog:
     tf = throttle_log_requests
 
 
-nrServer = Numerous(apiKey=k, throttle=tf, throttleData=td)
+nrServer = Numerous(apiKey=k, throttle=tf, throttleData=td,
+                    rateLimiter='shared' if args.sharedlimit else None)
 
 
 # if we've been asked to report server statistics, enhance the
@@ -807,7 +813,7 @@ def getMetrics(nr, limit=None):
     n = 0
     metrics = []
 
-    for m in nr.metrics():
+    for m in nr.metrics(limit=limit):
         if limit and n == limit:
             break
 
@@ -973,8 +979,29 @@ def mainCommandProcessing(nr, args):
 
     #
     # If we're doing this by name, translate the IDs first
+    # (all at once, so the metrics collection is only read once)
     #
 
+    byLabel = {}
+    if args.name:
+        if args.regexp:
+            mtype = 'ONE'
+        else:
+            mtype = 'STRING'
+
+        labels = []
+        for mspec in metrics:
+            if mspecIDKey in mspec:
+                s = mspec[mspecIDKey]
+            else:
+                s = mspec
+            # labels for new metrics (-wM +label) aren't looked up
+            if not (args.write and args.metric and s[0] == '+'):
+                labels.append(s)
+
+        if labels:
+            byLabel = dict(zip(labels, nr.metricsByLabels(labels, mtype)))
+
     resultList = []
     exitStatus = 0
 
@@ -1045,17 +1072,11 @@ def mainCommandProcessing(nr, args):
             else:
                 metric = None
                 if args.name:
-                    if args.regexp:
-                        mtype = 'ONE'
-                    else:
-                        mtype = 'STRING'
-
-                    s = r['ID']
-                    try:
-                        metric = nr.metricByLabel(s, matchType=mtype)
-                    except NumerousMetricConflictError as e:
-                        print(("More than one match: ", e.details))
+                    metric = byLabel.get(r['ID'])
+                    if isinstance(metric, NumerousMetricConflictError):
+                        print(("More than one match: ", metric.details))
                         metric = None
+                foundByLabel = metric is not None
                 if not metric:
                     metric = nr.metric(r['ID'])
 
@@ -1064,7 +1085,9 @@ def mainCommandProcessing(nr, args):
                 # Only do this when args.name because it's extra overhead so we
                 # don't do it when you look more likely to be a script (because
                 # you used the lower level metric ID directly)
-                if args.name and not metric.validate():
+                # A metric that was found by label came from the metrics
+                # collection so it is known to be valid already.
+                if args.name and not foundByLabel and not metric.validate():
                     invalidMetric = True
 
             if invalidMetric:
@@ -1248,20 +1271,20 @@ def mainCommandProcessing(nr, args):
                 if 'ID2' in r:
                     r['result'] = [ metric.interaction(r['ID2']) ]
                 else:
-                    iterable = metric.interactions()
+                    iterable = metric.interactions(limit=args.limit)
                     r['result'] = getIterableStuff(metric, iterable, args.limit)
 
             elif args.perms:
                 if 'ID2' in r:
                     r['result'] = [ metric.get_permission(r['ID2']) ]
                 else:
-                    iterable = metric.permissions()
+                    iterable = metric.permissions(limit=args.limit)
                     r['result'] = getIterableStuff(metric, iterable, args.limit)
 
             elif args.stream:
                 # no support for reading a single stream item
                 # (read a single item using the interaction/event interfaces)
-                iterable = metric.stream()
+                iterable = metric.stream(limit=args.limit)
                 r['result'] = getIterableStuff(metric, iterable, args.limit)
 
             elif args.event:
@@ -1273,7 +1296,7 @@ def mainCommandProcessing(nr, args):
                     else:
                         r['result'] = [ metric.event(evID=id2) ]
                 else:
-                    iterable = metric.events()
+                    iterable = metric.events(limit=args.limit)
                     r['result'] = getIterableStuff(metric, iterable, args.limit)
 
             elif args.photo:
@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+#
+# Tests adaptive concurrency (readMany/writeMany with
+# concurrency='adaptive', see NumerousAdaptiveConcurrency) against local
+# stand-in servers (nrserver.py).
+#
+# arguments:
+#    -n amt       : number of metrics (default 60)
+#    -r rate      : rate allocation per window of the limited server
+#                   (default 20)
+#    -w window    : rate window in seconds of the limited server (default 3)
+#    -L latency   : stand-in server latency in seconds (default 0.05)
+#
+# Three cases:
+#
+#    - a server with no (effective) rate limit: requests never get
+#      throttled, so the limit has to grow from its initial value.
+#
+#    - a server with a small rate allocation: requests get throttled, so
+#      the limit has to be cut back below the maximum.
+#
+#    - the same with AsyncNumerous (skipped if aiohttp isn't installed).
+#
+# In every case every read and write has to succeed (being throttled just
+# makes them slower) and nothing may be left in flight at the end.
+#
+import argparse
+import asyncio
+import time
+import numerous
+import nrserver
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-n', '--nmetrics', type=int, default=60)
+parser.add_argument('-r', '--rate', type=int, default=20)
+parser.add_argument('-w', '--window', type=int, default=3)
+parser.add_argument('-L', '--latency', type=float, default=0.05)
+
+args = parser.parse_args()
+failed = False
+
+# checks the results of a readMany/writeMany and the limiter afterwards
+def check(what, rslts, ac, t0, grew):
+    errs = [ r for r in rslts.values() if isinstance(r, Exception) ]
+    print("{}: {} done, {} errors, {:.1f} seconds, limit {:.1f} "
+          "(of {}), {} in flight".format(what, len(rslts), len(errs),
+                                         time.time() - t0, ac.limit,
+                                         ac.maximum, ac.inflight))
+    bad = False
+    if errs:
+        print("FAILED: {}".format(errs[0]))
+        bad = True
+    if ac.inflight != 0:
+        print("FAILED: left in flight")
+        bad = True
+    if grew and ac.limit <= 2:
+        print("FAILED: the limit didn't grow")
+        bad = True
+    if not grew and ac.limit >= ac.maximum:
+        print("FAILED: the limit wasn't cut")
+        bad = True
+    return bad
+
+def server(rate, window):
+    srv = nrserver.NumerousStandIn(rate=rate, window=window,
+                                   latency=args.latency).start()
+    srv.populate(args.nmetrics)
+    return srv, list(srv.data.metrics)
+
+#
+# no rate limit: the limit grows
+#
+srv, ids = server(1000000000, 60)
+nr = numerous.Numerous(apiKey='nmrs_adaptive', server=srv.serverURL)
+ac = numerous.NumerousAdaptiveConcurrency(initial=2, maximum=10)
+t0 = time.time()
+failed |= check("unlimited readMany", nr.readMany(ids, concurrency=ac),
+                ac, t0, True)
+t0 = time.time()
+failed |= check("unlimited writeMany",
+                nr.writeMany({ i : 1 for i in ids }, concurrency=ac),
+                ac, t0, True)
+srv.stop()
+
+#
+# a small allocation: the limit is cut
+#
+srv, ids = server(args.rate, args.window)
+nr = numerous.Numerous(apiKey='nmrs_adaptive', server=srv.serverURL)
+ac = numerous.NumerousAdaptiveConcurrency(initial=10, maximum=10)
+t0 = time.time()
+failed |= check("limited readMany", nr.readMany(ids, concurrency=ac),
+                ac, t0, False)
+srv.stop()
+
+#
+# the same with AsyncNumerous
+#
+async def asyncReads(srv, ids, ac):
+    async with numerous.AsyncNumerous(apiKey='nmrs_adaptive',
+                                      server=srv.serverURL) as anr:
+        return await anr.readMany(ids, concurrency=ac)
+
+if numerous.aiohttp is None:
+    print("async: skipped (no aiohttp)")
+else:
+    srv, ids = server(args.rate, args.window)
+    ac = numerous.NumerousAdaptiveConcurrency(initial=10, maximum=10)
+    t0 = time.time()
+    rslts = asyncio.run(asyncReads(srv, ids, ac))
+    failed |= check("limited async readMany", rslts, ac, t0, False)
+    srv.stop()
+
+print("FAILED" if failed else "OK")
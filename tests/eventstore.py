@@ -0,0 +1,137 @@
+#!/usr/bin/python3
+#
+# Tests NumerousEventStore (the local sqlite copy of event collections)
+# against a local stand-in server (nrserver.py).
+#
+# arguments:
+#    -e events    : number of events the metric starts with (default 250)
+#    -c chunk     : stand-in server collection chunk size (default 10)
+#
+# The server has the duplicate-at-chunk-boundary bug turned on. In order:
+#
+#    - the first sync gets every event
+#    - after a few more writes, an incremental sync gets just those, with
+#      one chunk request; with nothing new it's one chunk request and
+#      nothing added
+#    - a sync that fails part way through (the connection fails after the
+#      first chunk) keeps none of what it got; the next one gets all of it
+#    - an event written with an older "updated" time isn't seen by an
+#      incremental sync but is by sync(full=True)
+#    - forget() throws it all away
+#
+# After each step the stored events have to be exactly the server's (the
+# same IDs in the same order).
+#
+import argparse
+import os
+import tempfile
+import requests
+import numerous
+import nrserver
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-e', '--events', type=int, default=250)
+parser.add_argument('-c', '--chunksize', type=int, default=10)
+
+args = parser.parse_args()
+failed = False
+
+
+# A transport that (once armed) lets n more requests through and then
+# fails every one after that, as if the network went away
+class FailingTransport(numerous.NumerousRequestsTransport):
+    failAfter = None
+
+    def request(self, *args):
+        if self.failAfter is not None:
+            if self.failAfter <= 0:
+                raise requests.exceptions.ConnectionError("failing on purpose")
+            self.failAfter -= 1
+        return numerous.NumerousRequestsTransport.request(self, *args)
+
+
+srv = nrserver.NumerousStandIn(chunkSize=args.chunksize, dupBug=True).start()
+srv.populate(1, args.events)
+mId = list(srv.data.metrics)[0]
+
+transport = FailingTransport()
+nr = numerous.Numerous(apiKey='nmrs_eventstore', server=srv.serverURL,
+                       transport=transport)
+m = nr.metric(mId)
+
+tmpd = tempfile.TemporaryDirectory()
+store = numerous.NumerousEventStore(os.path.join(tmpd.name, 'events.db'))
+
+
+# one sync; checks how many were added (and chunks used, if given) and
+# that the store matches the server afterwards
+def step(what, expected, chunks=None, **kw):
+    c0 = srv.stats.get('chunks', 0)
+    n = store.sync(m, **kw)
+    used = srv.stats.get('chunks', 0) - c0
+    print("{}: {} added, {} chunks".format(what, n, used))
+    bad = False
+    if n != expected:
+        print("FAILED: expected {} added".format(expected))
+        bad = True
+    if chunks is not None and used != chunks:
+        print("FAILED: expected {} chunk(s)".format(chunks))
+        bad = True
+    return bad | same(what)
+
+def same(what):
+    with srv.data.lock:
+        onServer = [ e['id'] for e in srv.data.events[mId] ]
+    stored = [ e['id'] for e in store.events(m) ]
+    if stored != onServer:
+        print("FAILED: {}: store has {} events, server {}".format(
+                  what, len(stored), len(onServer)))
+        return True
+    return False
+
+failed |= step("first sync", args.events + 1)
+
+for i in range(3):
+    m.write(1000 + i)
+failed |= step("after 3 writes", 3, chunks=1)
+failed |= step("nothing new", 0, chunks=1)
+
+# more than a chunk's worth of new events, and the connection fails
+# after the first chunk of them
+nNew = args.chunksize * 2
+for i in range(nNew):
+    m.write(2000 + i)
+transport.failAfter = 1
+try:
+    store.sync(m)
+    print("FAILED: the sync didn't fail")
+    failed = True
+except numerous.NumerousError as e:
+    print("failed sync: {} (code {})".format(type(e).__name__, e.code))
+transport.failAfter = None
+if store.count(m) != args.events + 4:
+    print("FAILED: the failed sync kept {} events".format(
+              store.count(m) - (args.events + 4)))
+    failed = True
+failed |= step("after the failed sync", nNew)
+
+# an event "in the past" is behind the newest one in the collection
+oldest = store.events(m)[-1]['updated']
+m.write(3000, updated=oldest)
+n = store.sync(m)
+print("incremental, event in the past: {} added".format(n))
+if n != 0:
+    print("FAILED: an incremental sync went past what it already had")
+    failed = True
+failed |= step("full sync", 1, full=True)
+
+store.forget(m)
+print("forget: {} left".format(store.count(m)))
+if store.count(m) != 0:
+    print("FAILED: forget() didn't")
+    failed = True
+
+store.close()
+tmpd.cleanup()
+srv.stop()
+print("FAILED" if failed else "OK")
@@ -0,0 +1,124 @@
+#!/usr/bin/python3
+#
+# Tests non-blocking mode (Numerous(blocking=False)) against a local
+# stand-in server (nrserver.py) with a small rate allocation.
+#
+# arguments:
+#    -n amt       : number of reads (default 40)
+#    -r rate      : stand-in server rate allocation per window (default 20)
+#    -w window    : stand-in server rate window in seconds (default 4)
+#
+# A simple "scheduler" does the reads; any time one raises
+# NumerousRetryAfter it goes off and does other work (sleeps, here) until
+# retryAfter seconds have gone by and then tries again. No call should
+# ever take long (i.e., wait inside the library) and there should be no
+# 429s at the server.
+#
+# Then the same with a collection iterator (events, with a small chunk
+# size so that the walk takes more than one rate window, and with the
+# duplicate-at-chunk-boundary server bug turned on): the
+# NumerousRetryAfter has to come out of the iterator as is, and the
+# iteration can be resumed (with the same iterator) after the wait.
+# That's done three times: plain, with prefetch (where the chunks come
+# from a separate thread, which has to start over after the error), and
+# with a limit (which the failed tries mustn't use up). An iteration that
+# takes more than a minute is taken to be hung.
+#
+import argparse
+import os
+import threading
+import time
+import numerous
+import nrserver
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-n', '--nreads', type=int, default=40)
+parser.add_argument('-r', '--rate', type=int, default=20)
+parser.add_argument('-w', '--window', type=int, default=4)
+
+args = parser.parse_args()
+
+srv = nrserver.NumerousStandIn(rate=args.rate, window=args.window,
+                               chunkSize=5, dupBug=True).start()
+srv.populate(3, 30)
+nr = numerous.Numerous(apiKey='nmrs_nonblocking', server=srv.serverURL,
+                       blocking=False)
+
+ids = [ m['id'] for m in nr.metrics() ]
+failed = False
+
+#
+# reads
+#
+done = 0
+raised = 0
+longest = 0
+notBefore = 0
+t0 = time.time()
+while done < args.nreads:
+    if time.time() < notBefore:
+        time.sleep(0.01)              # "other work"
+        continue
+    t = time.time()
+    try:
+        nr.metric(ids[done % len(ids)]).read()
+        done += 1
+    except numerous.NumerousRetryAfter as e:
+        raised += 1
+        notBefore = time.time() + e.retryAfter
+    longest = max(longest, time.time() - t)
+
+print("reads: {} done, {} NumerousRetryAfter, {:.1f} seconds, "
+      "longest call {:.3f}, server 429s {}".format(
+          done, raised, time.time() - t0, longest, srv.stats.get('429', 0)))
+if longest > 0.5:
+    print("FAILED: a call waited inside the library")
+    failed = True
+
+#
+# collection iterators
+#
+
+# walks it (resuming after each NumerousRetryAfter) and checks that
+# expected items came out; returns True if that didn't work
+def walk(what, it, expected):
+    def hung():
+        print("FAILED: {} hung after {} items".format(what, len(evs)))
+        os._exit(1)
+    watchdog = threading.Timer(60, hung)
+    watchdog.daemon = True
+    watchdog.start()
+
+    evs = []
+    raised = 0
+    bad = False
+    while True:
+        try:
+            evs.append(next(it))
+        except StopIteration:
+            break
+        except numerous.NumerousRetryAfter as e:
+            raised += 1
+            time.sleep(e.retryAfter)
+        except numerous.NumerousError as e:
+            print("FAILED: {} raised {} (code {}) instead of "
+                  "NumerousRetryAfter".format(what, type(e).__name__, e.code))
+            bad = True
+            break
+    watchdog.cancel()
+
+    print("{}: {} of {}, {} NumerousRetryAfter".format(
+              what, len(evs), expected, raised))
+    if not bad and len(evs) != expected:
+        print("FAILED: wrong number of items")
+        bad = True
+    return bad
+
+m = nr.metric(ids[0])
+nevents = len(srv.data.events[ids[0]])
+failed |= walk("events", m.events(), nevents)
+failed |= walk("events(prefetch=2)", m.events(prefetch=2), nevents)
+failed |= walk("events(limit=20)", m.events(limit=20), min(nevents, 20))
+
+srv.stop()
+print("FAILED" if failed else "OK")
@@ -0,0 +1,749 @@
+#!/usr/bin/python3
+#
+# Local stand-in for the NumerousApp v2 API server.
+#
+# All the other test drivers (t429.py, ratetest.py, yatom.py, nrTEST)
+# talk to the real api.numerousapp.com which makes it impossible to
+# benchmark anything offline and makes throughput regression testing
+# depend on network conditions (and on your API rate allocation).
+#
+# This program implements (in memory) the endpoints described in the
+# NumerousMetric.__APIInfo and Numerous.__APIInfo tables:
+#
+#     /v2/metrics                                   POST (create)
+#     /v2/metrics/popular?count=N                   GET
+#     /v2/metrics/{metricId}                        GET PUT DELETE
+#     /v2/metrics/{metricId}/events                 GET POST
+#     /v2/metrics/{metricId}/events/at?t=timestamp  GET
+#     /v2/metrics/{metricId}/events/{eventID}       GET DELETE
+#     /v2/metrics/{metricId}/stream                 GET
+#     /v2/metrics/{metricId}/interactions           GET POST
+#     /v2/metrics/{metricId}/interactions/{item}    GET DELETE
+#     /v2/metrics/{metricId}/subscriptions          GET
+#     /v2/metrics/{metricId}/subscriptions/{userId} GET PUT
+#     /v2/metrics/{metricId}/permissions            GET
+#     /v2/metrics/{metricId}/permissions/{userId}   GET PUT DELETE
+#     /v2/metrics/{metricId}/photo                  GET POST DELETE
+#     /v2/users/{userId}                            GET
+#     /v2/users/{userId}/photo                      POST
+#     /v2/users/{userId}/metrics                    GET
+#     /v2/users/{userId}/subscriptions              GET
+#
+# Collections are chunked the same way the real server does it: each
+# response carries a list ('events', 'items', 'metrics', etc) and a
+# 'next' or 'nextURL' (absolute URL) until the end of the collection.
+#
+# Every response carries X-Rate-Limit-Remaining and X-Rate-Limit-Reset.
+# Just like the real server the allocation is refreshed at the "top"
+# of each rate window (not a rolling window). When the allocation is
+# exhausted requests get 429 "Too Many Requests" until the reset.
+#
+# Optionally the server can:
+#     - inject latency (fixed plus random jitter) into every response
+#     - stall some fraction of the responses for a long(er) time
+#     - inject server errors (500) at some rate
+#     - reproduce the duplicate-at-chunk-boundary server bug: the last
+#       item of the previous chunk is repeated at the start of the next
+#       chunk (only for the collections that have a 'dupFilter')
+#
+# Point a Numerous at it by giving a full URL as the server:
+#
+#     nr = numerous.Numerous(apiKey='anything', server='http://127.0.0.1:8080')
+#
+# It can also be used from inside a python test program:
+#
+#     import nrserver
+#     srv = nrserver.NumerousStandIn(latency=0.05)
+#     srv.start()                # runs in a background thread
+#     nr = numerous.Numerous(apiKey='anything', server=srv.serverURL)
+#     ...
+#     srv.stop()
+#
+# arguments (when run as a program):
+#    -p port      : port to listen on (default 8080)
+#    -b address   : address to bind (default 127.0.0.1)
+#    -k apikey    : only accept this API key (default: any key accepted)
+#    -r rate      : API calls allowed per rate window (default 300)
+#    -w window    : length of the rate window in seconds (default 60)
+#    -c chunk     : collection chunk size (default 100)
+#    -L latency   : seconds of latency added to every response (default 0)
+#    -J jitter    : additional random latency, 0..jitter seconds (default 0)
+#    -S fraction  : fraction (0..1) of responses that stall ...
+#    -T stall     : ... for this many additional seconds (default 2)
+#    -E fraction  : fraction (0..1) of requests answered with a 500 error
+#    -n metrics   : create this many metrics at startup (default 0)
+#    -e events    : ... each with this many events (default 0)
+#    --dupbug     : reproduce the duplicate-at-chunk-boundary bug
+#    -v           : log every request on stderr
+#
+import argparse
+import base64
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlsplit, parse_qs
+except ImportError:
+    # You are using python2.
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlsplit, parse_qs
+
+
+# the (single) user that owns the API key; 'me' is an alias for this
+StandInUserId = '66178735'
+
+
+def _timestamp(t=None):
+    if t is None:
+        t = time.time()
+    ts = time.strftime('%Y-%m-%dT%H:%M:%S.', time.gmtime(t))
+    return "{}{:03d}Z".format(ts, int((t % 1) * 1000))
+
+
+#
+# The in-memory "database". A single lock protects all of it; this is
+# a test server, concurrency at the server end is not the point.
+#
+class _StandInData:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.metrics = {}          # metricId -> metric attribute dict
+        self.events = {}           # metricId -> list (newest first)
+        self.interactions = {}     # metricId -> list (newest first)
+        self.subscriptions = {}    # metricId -> { userId : subscription }
+        self.permissions = {}      # metricId -> { userId : permission }
+        self.photos = {}           # metricId (or 'user') -> bytes
+        self.__nextId = random.randint(10**18, 2*10**18)
+
+        self.user = { 'id' : StandInUserId,
+                      'userName' : 'standin',
+                      'fullName' : 'Stand-In Test User',
+                      'links' : {} }
+
+    def newId(self):
+        self.__nextId += random.randint(1, 1000)
+        return str(self.__nextId)
+
+    def newMetric(self, attrs):
+        mId = self.newId()
+        now = _timestamp()
+        m = { 'kind' : 'metric', 'description' : '', 'units' : '',
+              'private' : False, 'visibility' : 'public',
+              'graphingEnabled' : True, 'value' : 0,
+              'subscriptionCount' : 0 }
+        m.update(attrs)
+        m['id'] = mId
+        m['ownerId'] = StandInUserId
+        m['created'] = now
+        m['updated'] = now
+        m['links'] = {
+            'self' : 'https://api.numerousapp.com/v2/metrics/' + mId,
+            'web' : 'http://n.numerousapp.com/m/' + _base36(int(mId))
+        }
+        self.metrics[mId] = m
+        self.interactions[mId] = []
+        self.subscriptions[mId] = {}
+        self.permissions[mId] = {}
+
+        # the initial value event has no authorId (same as the real server)
+        self.events[mId] = [ { 'kind' : 'event', 'id' : self.newId(),
+                               'metricId' : mId, 'value' : m['value'],
+                               'updated' : now } ]
+        return m
+
+    def newEvent(self, mId, value, updated=None):
+        ev = { 'kind' : 'event', 'id' : self.newId(), 'metricId' : mId,
+               'value' : value, 'authorId' : StandInUserId,
+               'updated' : updated or _timestamp() }
+
+        # keep the list newest first even if "updated" was supplied
+        evl = self.events[mId]
+        i = 0
+        while i < len(evl) and evl[i]['updated'] > ev['updated']:
+            i += 1
+        evl.insert(i, ev)
+        if i == 0:
+            self.metrics[mId]['value'] = value
+            self.metrics[mId]['updated'] = ev['updated']
+        return ev
+
+    # the stream is the events and interactions merged (newest first)
+    def stream(self, mId):
+        s = self.events[mId] + self.interactions[mId]
+        s.sort(key=lambda x: x['updated'], reverse=True)
+        return s
+
+
+def _base36(n):
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    s = ''
+    while n:
+        n, r = divmod(n, 36)
+        s = digits[r] + s
+    return s or '0'
+
+
+#
+# Request handler. Routes are matched in order; the first match wins.
+# Each route handler returns (code, jsonable-or-None) or raises _HTTPErr
+#
+class _HTTPErr(Exception):
+    def __init__(self, code, reason=None):
+        self.code = code
+        self.reason = reason
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'         # keep-alive, like the real server
+    disable_nagle_algorithm = True        # headers and body are separate writes
+
+    def log_message(self, fmt, *args):
+        if self.server.standin.verbose:
+            BaseHTTPRequestHandler.log_message(self, fmt, *args)
+
+    def do_GET(self):
+        self.__dispatch('GET')
+
+    def do_POST(self):
+        self.__dispatch('POST')
+
+    def do_PUT(self):
+        self.__dispatch('PUT')
+
+    def do_DELETE(self):
+        self.__dispatch('DELETE')
+
+    def __dispatch(self, method):
+        si = self.server.standin
+        n = int(self.headers.get('Content-Length', 0) or 0)
+        self.body = self.rfile.read(n) if n > 0 else b''
+
+        si._count('requests')
+        if not self.__authorized(si):
+            si._count('401')
+            return self.__reply(401, None, rate=False)
+
+        remaining, reset = si._rateAdmit()
+        self.rateHeaders = (remaining, reset)
+        if remaining < 0:
+            si._count('429')
+            return self.__reply(429, { 'error' : 'Too Many Requests' })
+
+        si._delay()
+        if si.errorRate > 0 and random.random() < si.errorRate:
+            si._count('500')
+            return self.__reply(500, None)
+
+        u = urlsplit(self.path)
+        self.query = parse_qs(u.query)
+        for rx, meth, func in self.__routes:
+            mx = re.match(rx + '$', u.path)
+            if mx and meth == method:
+                try:
+                    with si.data.lock:
+                        code, j = func(self, si, *mx.groups())
+                except _HTTPErr as x:
+                    code, j = x.code, None
+                return self.__reply(code, j)
+
+        # path recognized with some other method is 405; else 404
+        for rx, meth, func in self.__routes:
+            if re.match(rx + '$', u.path):
+                return self.__reply(405, None)
+        return self.__reply(404, None)
+
+    def __authorized(self, si):
+        a = self.headers.get('Authorization', '')
+        if not a.startswith('Basic '):
+            return False
+        try:
+            k = base64.b64decode(a[6:].encode('ascii')).decode('utf-8')
+        except (ValueError, UnicodeDecodeError):
+            return False
+        k = k.split(':')[0]
+        return len(k) > 0 and (si.apiKey is None or k == si.apiKey)
+
+    def __reply(self, code, j, rate=True, ctype='application/json'):
+        if isinstance(j, bytes):
+            data = j
+        elif j is None:
+            data = b''
+        else:
+            data = json.dumps(j).encode('utf-8')
+        self.send_response(code)
+        if rate:
+            self.send_header('X-Rate-Limit-Remaining', max(self.rateHeaders[0], 0))
+            self.send_header('X-Rate-Limit-Reset', self.rateHeaders[1])
+        if data:
+            self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', len(data))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def __json(self):
+        try:
+            return json.loads(self.body.decode('utf-8'))
+        except ValueError:
+            raise _HTTPErr(400)
+
+    # absolute URL for a server-relative path (nextURL etc)
+    def __absURL(self, path):
+        host = self.headers.get('Host', self.server.standin.hostport)
+        return 'http://' + host + path
+
+    #
+    # Chunk up a collection. The position is an offset into the list, which
+    # naturally reproduces the real-world situation where items inserted at
+    # the front (newest) between chunk fetches show up again in a later
+    # chunk. With --dupbug the last item of the previous chunk is also
+    # deliberately repeated at the start of each chunk.
+    #
+    def __chunked(self, si, items, listKey, nextKey, dupable=False):
+        try:
+            start = int(self.query.get('offset', ['0'])[0])
+        except ValueError:
+            raise _HTTPErr(400)
+        size = si.chunkSize
+        chunk = items[start:start+size]
+        if dupable and si.dupBug and start > 0 and start <= len(items):
+            chunk.insert(0, items[start-1])
+            si._count('duplicatesInjected')
+
+        rslt = { listKey : chunk }
+        if start + size < len(items):
+            p = urlsplit(self.path).path
+            rslt[nextKey] = self.__absURL("{}?offset={}".format(p, start+size))
+        si._count('chunks')
+        return (200, rslt)
+
+    def __metric(self, si, mId):
+        if not mId.isdigit():
+            raise _HTTPErr(400)
+        if mId not in si.data.metrics:
+            raise _HTTPErr(404)
+        return si.data.metrics[mId]
+
+    def __user(self, userId):
+        if userId in ('me', StandInUserId):
+            return StandInUserId
+        raise _HTTPErr(403)
+
+    # ---- metrics
+
+    def _createMetric(self, si):
+        j = self.__json()
+        if 'label' not in j:
+            raise _HTTPErr(400)
+        return (201, si.data.newMetric(j))
+
+    def _popular(self, si):
+        try:
+            n = min(int(self.query.get('count', ['10'])[0]), 20)
+        except ValueError:
+            raise _HTTPErr(400)
+        ms = sorted(si.data.metrics.values(),
+                    key=lambda m: m['subscriptionCount'], reverse=True)
+        return (200, ms[:n])
+
+    def _getMetric(self, si, mId):
+        return (200, self.__metric(si, mId))
+
+    def _putMetric(self, si, mId):
+        m = self.__metric(si, mId)
+        j = self.__json()
+        for k in j:
+            if k not in ('id', 'value', 'links', 'ownerId', 'created'):
+                m[k] = j[k]
+        return (200, m)
+
+    def _deleteMetric(self, si, mId):
+        self.__metric(si, mId)
+        d = si.data
+        for x in (d.metrics, d.events, d.interactions,
+                  d.subscriptions, d.permissions, d.photos):
+            x.pop(mId, None)
+        return (204, None)
+
+    # ---- events
+
+    def _getEvents(self, si, mId):
+        self.__metric(si, mId)
+        return self.__chunked(si, si.data.events[mId], 'events', 'nextURL',
+                              dupable=True)
+
+    def _postEvent(self, si, mId):
+        m = self.__metric(si, mId)
+        j = self.__json()
+        if 'value' not in j:
+            raise _HTTPErr(400)
+        v = j['value']
+        if j.get('action') == 'ADD':
+            v = m['value'] + v
+        if j.get('onlyIfChanged') and v == m['value']:
+            raise _HTTPErr(409)
+        upd = j.get('updated')
+        if upd and not re.match(r'\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}Z$', upd):
+            raise _HTTPErr(400)
+        return (201, si.data.newEvent(mId, v, upd))
+
+    def _eventAt(self, si, mId):
+        self.__metric(si, mId)
+        t = self.query.get('t', [''])[0]
+        for ev in si.data.events[mId]:
+            if ev['updated'] <= t:
+                return (200, ev)
+        raise _HTTPErr(404)
+
+    def _getEvent(self, si, mId, evId):
+        self.__metric(si, mId)
+        for ev in si.data.events[mId]:
+            if ev['id'] == evId:
+                return (200, ev)
+        raise _HTTPErr(404)
+
+    def _deleteEvent(self, si, mId, evId):
+        self.__metric(si, mId)
+        evl = si.data.events[mId]
+        for i in range(len(evl)):
+            if evl[i]['id'] == evId:
+                del evl[i]
+                return (204, None)
+        return (200, None)        # the real server says "OK" for these
+
+    # ---- stream and interactions
+
+    def _getStream(self, si, mId):
+        self.__metric(si, mId)
+        return self.__chunked(si, si.data.stream(mId), 'items', 'next',
+                              dupable=True)
+
+    def _getInteractions(self, si, mId):
+        self.__metric(si, mId)
+        return self.__chunked(si, si.data.interactions[mId],
+                              'interactions', 'nextURL', dupable=True)
+
+    def _postInteraction(self, si, mId):
+        self.__metric(si, mId)
+        j = self.__json()
+        if j.get('kind') not in ('comment', 'like', 'error'):
+            raise _HTTPErr(400)
+        ix = { 'id' : si.data.newId(), 'metricId' : mId,
+               'authorId' : StandInUserId, 'updated' : _timestamp() }
+        ix.update(j)
+        si.data.interactions[mId].insert(0, ix)
+        return (201, ix)
+
+    def _getInteraction(self, si, mId, iId):
+        self.__metric(si, mId)
+        for ix in si.data.interactions[mId]:
+            if ix['id'] == iId:
+                return (200, ix)
+        raise _HTTPErr(404)
+
+    def _deleteInteraction(self, si, mId, iId):
+        self.__metric(si, mId)
+        ixl = si.data.interactions[mId]
+        for i in range(len(ixl)):
+            if ixl[i]['id'] == iId:
+                del ixl[i]
+                return (204, None)
+        return (200, None)
+
+    # ---- subscriptions
+
+    def _getMetricSubs(self, si, mId):
+        self.__metric(si, mId)
+        subs = list(si.data.subscriptions[mId].values())
+        return self.__chunked(si, subs, 'subscriptions', 'nextURL')
+
+    def _getSub(self, si, mId, userId):
+        self.__metric(si, mId)
+        u = self.__user(userId)
+        # not subscribed: the defaults (which is what you would get)
+        s = si.data.subscriptions[mId].get(u)
+        if not s:
+            s = { 'metricId' : mId, 'userId' : u,
+                  'notificationsEnabled' : False }
+        return (200, s)
+
+    def _putSub(self, si, mId, userId):
+        m = self.__metric(si, mId)
+        u = self.__user(userId)
+        subs = si.data.subscriptions[mId]
+        code = 200 if u in subs else 201
+        s = { 'notificationsEnabled' : False }
+        s.update(self.__json())
+        s['metricId'] = mId
+        s['userId'] = u
+        subs[u] = s
+        m['subscriptionCount'] = len(subs)
+        return (code, s)
+
+    def _getUserSubs(self, si, userId):
+        u = self.__user(userId)
+        subs = [ s[u] for s in si.data.subscriptions.values() if u in s ]
+        return self.__chunked(si, subs, 'subscriptions', 'nextURL')
+
+    # ---- permissions
+
+    def _getPerms(self, si, mId):
+        self.__metric(si, mId)
+        perms = list(si.data.permissions[mId].values())
+        return self.__chunked(si, perms, 'permissions', 'nextURL')
+
+    def _getPerm(self, si, mId, userId):
+        self.__metric(si, mId)
+        p = si.data.permissions[mId].get(userId)
+        if not p:
+            raise _HTTPErr(404)
+        return (200, p)
+
+    def _putPerm(self, si, mId, userId):
+        self.__metric(si, mId)
+        p = self.__json()
+        p['metricId'] = mId
+        p['userId'] = userId
+        si.data.permissions[mId][userId] = p
+        return (200, p)
+
+    def _deletePerm(self, si, mId, userId):
+        self.__metric(si, mId)
+        if si.data.permissions[mId].pop(userId, None) is None:
+            raise _HTTPErr(404)
+        return (204, None)
+
+    # ---- photos
+
+    def _postPhoto(self, si, mId):
+        m = self.__metric(si, mId)
+        si.data.photos[mId] = self.body
+        m['photoURL'] = self.__absURL('/v2/metrics/{}/photo'.format(mId))
+        return (201, m)
+
+    def _getPhoto(self, si, mId):
+        self.__metric(si, mId)
+        if mId not in si.data.photos:
+            raise _HTTPErr(404)
+        return (200, si.data.photos[mId])
+
+    def _deletePhoto(self, si, mId):
+        m = self.__metric(si, mId)
+        if si.data.photos.pop(mId, None) is None:
+            raise _HTTPErr(404)
+        m.pop('photoURL', None)
+        return (204, None)
+
+    # ---- users
+
+    def _getUser(self, si, userId):
+        self.__user(userId)
+        return (200, si.data.user)
+
+    def _postUserPhoto(self, si, userId):
+        self.__user(userId)
+        si.data.photos['user'] = self.body
+        si.data.user['photoURL'] = self.__absURL('/v2/users/me/photo')
+        return (201, si.data.user)
+
+    def _getUserMetrics(self, si, userId):
+        u = self.__user(userId)
+        ms = [ m for m in si.data.metrics.values() if m['ownerId'] == u ]
+        return self.__chunked(si, ms, 'metrics', 'nextURL')
+
+    __routes = [
+        (r'/v2/metrics', 'POST', _createMetric),
+        (r'/v2/metrics/popular', 'GET', _popular),
+        (r'/v2/metrics/(\w+)', 'GET', _getMetric),
+        (r'/v2/metrics/(\w+)', 'PUT', _putMetric),
+        (r'/v2/metrics/(\w+)', 'DELETE', _deleteMetric),
+        (r'/v2/metrics/(\w+)/events', 'GET', _getEvents),
+        (r'/v2/metrics/(\w+)/events', 'POST', _postEvent),
+        (r'/v2/metrics/(\w+)/events/at', 'GET', _eventAt),
+        (r'/v2/metrics/(\w+)/events/(\w+)', 'GET', _getEvent),
+        (r'/v2/metrics/(\w+)/events/(\w+)', 'DELETE', _deleteEvent),
+        (r'/v2/metrics/(\w+)/stream', 'GET', _getStream),
+        (r'/v2/metrics/(\w+)/interactions', 'GET', _getInteractions),
+        (r'/v2/metrics/(\w+)/interactions', 'POST', _postInteraction),
+        (r'/v2/metrics/(\w+)/interactions/(\w+)', 'GET', _getInteraction),
+        (r'/v2/metrics/(\w+)/interactions/(\w+)', 'DELETE', _deleteInteraction),
+        (r'/v2/metrics/(\w+)/subscriptions', 'GET', _getMetricSubs),
+        (r'/v2/metrics/(\w+)/subscriptions/(\w+)', 'GET', _getSub),
+        (r'/v2/metrics/(\w+)/subscriptions/(\w+)', 'PUT', _putSub),
+        (r'/v2/metrics/(\w+)/permissions', 'GET', _getPerms),
+        (r'/v2/metrics/(\w+)/permissions/(\w+)', 'GET', _getPerm),
+        (r'/v2/metrics/(\w+)/permissions/(\w+)', 'PUT', _putPerm),
+        (r'/v2/metrics/(\w+)/permissions/(\w+)', 'DELETE', _deletePerm),
+        (r'/v2/metrics/(\w+)/photo', 'GET', _getPhoto),
+        (r'/v2/metrics/(\w+)/photo', 'POST', _postPhoto),
+        (r'/v2/metrics/(\w+)/photo', 'DELETE', _deletePhoto),
+        (r'/v2/users/(\w+)', 'GET', _getUser),
+        (r'/v2/users/(\w+)/photo', 'POST', _postUserPhoto),
+        (r'/v2/users/(\w+)/metrics', 'GET', _getUserMetrics),
+        (r'/v2/users/(\w+)/subscriptions', 'GET', _getUserSubs),
+    ]
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    # Clients that hang up before the response is sent (a request that
+    # was cancelled or timed out, the hedge that lost) are normal here;
+    # just count them rather than printing a traceback for each one.
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            self.standin._count('clientGone')
+        else:
+            HTTPServer.handle_error(self, request, client_address)
+
+
+#
+# The stand-in server itself. All the knobs are constructor arguments
+# (see the argument descriptions at the top of this file). The 'stats'
+# attribute counts requests, 429s, injected errors, chunks served, etc.
+#
+class NumerousStandIn:
+    def __init__(self, port=0, address='127.0.0.1', apiKey=None,
+                       rate=300, window=60, chunkSize=100,
+                       latency=0, jitter=0, errorRate=0, dupBug=False,
+                       verbose=False, stallRate=0, stall=2):
+        self.apiKey = apiKey
+        self.rate = rate
+        self.window = window
+        self.chunkSize = chunkSize
+        self.latency = latency
+        self.jitter = jitter
+        self.stallRate = stallRate
+        self.stall = stall
+        self.errorRate = errorRate
+        self.dupBug = dupBug
+        self.verbose = verbose
+        self.data = _StandInData()
+        self.stats = {}
+
+        self.__statsLock = threading.Lock()
+        self.__rateLock = threading.Lock()
+        self.__windowStart = None
+        self.__used = 0
+
+        self.httpd = _ThreadingHTTPServer((address, port), _StandInHandler)
+        self.httpd.standin = self
+        self.hostport = "{}:{}".format(*self.httpd.server_address[:2])
+        self.serverURL = 'http://' + self.hostport
+        self.__thread = None
+
+    def _count(self, what, n=1):
+        with self.__statsLock:
+            self.stats[what] = self.stats.get(what, 0) + n
+
+    # Consume one API from the current rate window. Returns the
+    # (remaining, reset) pair for the headers; remaining is negative if
+    # this request is over the limit. Windows are aligned to multiples of
+    # the window length, like the real server's "top of the minute".
+    def _rateAdmit(self):
+        with self.__rateLock:
+            now = time.time()
+            wstart = now - (now % self.window)
+            if wstart != self.__windowStart:
+                self.__windowStart = wstart
+                self.__used = 0
+            reset = int(math.ceil(wstart + self.window - now))
+            if self.__used >= self.rate:
+                return (-1, reset)
+            self.__used += 1
+            return (self.rate - self.__used, reset)
+
+    def _delay(self):
+        dt = self.latency
+        if self.jitter > 0:
+            dt += random.uniform(0, self.jitter)
+        if self.stallRate > 0 and random.random() < self.stallRate:
+            self._count('stalls')
+            dt += self.stall
+        if dt > 0:
+            time.sleep(dt)
+
+    # make a bunch of metrics (with events) to have something to work with
+    def populate(self, nMetrics, nEvents=0, labelPrefix='standin-'):
+        d = self.data
+        with d.lock:
+            t0 = time.time() - nEvents
+            for i in range(nMetrics):
+                m = d.newMetric({ 'label' : labelPrefix + str(i) })
+                mId = m['id']
+                # built directly (oldest first, then reversed) rather than
+                # via newEvent() which is quadratic for large histories
+                evl = d.events[mId]
+                if nEvents:
+                    # the initial value event has to be the oldest one
+                    evl[-1]['updated'] = _timestamp(t0 - 1)
+                evl.reverse()
+                for e in range(nEvents):
+                    evl.append({ 'kind' : 'event', 'id' : d.newId(),
+                                 'metricId' : mId, 'value' : e+1,
+                                 'authorId' : StandInUserId,
+                                 'updated' : _timestamp(t0 + e) })
+                evl.reverse()
+                m['value'] = evl[0]['value']
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.httpd.serve_forever)
+        self.__thread.daemon = True
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.__thread:
+            self.__thread.join()
+            self.__thread = None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-p', '--port', type=int, default=8080)
+    parser.add_argument('-b', '--bind', default='127.0.0.1')
+    parser.add_argument('-k', '--apikey')
+    parser.add_argument('-r', '--rate', type=int, default=300)
+    parser.add_argument('-w', '--window', type=int, default=60)
+    parser.add_argument('-c', '--chunksize', type=int, default=100)
+    parser.add_argument('-L', '--latency', type=float, default=0)
+    parser.add_argument('-J', '--jitter', type=float, default=0)
+    parser.add_argument('-S', '--stallrate', type=float, default=0)
+    parser.add_argument('-T', '--stall', type=float, default=2)
+    parser.add_argument('-E', '--errorrate', type=float, default=0)
+    parser.add_argument('-n', '--metrics', type=int, default=0)
+    parser.add_argument('-e', '--events', type=int, default=0)
+    parser.add_argument('--dupbug', action="store_true")
+    parser.add_argument('-v', '--verbose', action="store_true")
+    args = parser.parse_args()
+
+    srv = NumerousStandIn(port=args.port, address=args.bind,
+                          apiKey=args.apikey, rate=args.rate,
+                          window=args.window, chunkSize=args.chunksize,
+                          latency=args.latency, jitter=args.jitter,
+                          errorRate=args.errorrate, dupBug=args.dupbug,
+                          verbose=args.verbose, stallRate=args.stallrate,
+                          stall=args.stall)
+    srv.populate(args.metrics, args.events)
+
+    print("NumerousApp stand-in server at {}".format(srv.serverURL))
+    sys.stdout.flush()
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(srv.stats)
@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+#
+# Tests the NumerousRateLimiter (Numerous(rateLimiter=True)) against a
+# local stand-in server (nrserver.py).
+#
+# arguments:
+#    -n amt       : number of metrics for the readMany (default 60)
+#    -r rate      : stand-in server rate allocation per window (default 20)
+#    -w window    : stand-in server rate window in seconds (default 3)
+#    -t threads   : readMany concurrency (default 8)
+#
+# Three things are checked:
+#
+#    - a readMany of more metrics than the rate allocation, with several
+#      threads: the limiter has to hold the requests back so that the
+#      server never returns a 429.
+#
+#    - AsyncNumerous requests cancelled (asyncio.wait_for) while waiting
+#      for the server: each admitted request has to be observed even so,
+#      otherwise the limiter thinks it is still in flight (forever) and
+#      from then on admits that many fewer per window. Skipped if aiohttp
+#      isn't installed.
+#
+#    - hedged GETs (hedgePercentile) where some responses stall: the
+#      hedge that loses has to be observed too.
+#
+# In each case nothing may be left in flight at the end.
+#
+import argparse
+import asyncio
+import time
+import numerous
+import nrserver
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-n', '--nmetrics', type=int, default=60)
+parser.add_argument('-r', '--rate', type=int, default=20)
+parser.add_argument('-w', '--window', type=int, default=3)
+parser.add_argument('-t', '--threads', type=int, default=8)
+
+args = parser.parse_args()
+failed = False
+
+def inflightCheck(what, limiter):
+    print("{}: {} left in flight".format(what, limiter._inflight))
+    if limiter._inflight != 0:
+        print("FAILED: requests never observed")
+        return True
+    return False
+
+#
+# readMany with more reads than the allocation
+#
+srv = nrserver.NumerousStandIn(rate=args.rate, window=args.window).start()
+srv.populate(args.nmetrics)
+nr = numerous.Numerous(apiKey='nmrs_ratelimiter', server=srv.serverURL,
+                       rateLimiter=True, poolSize=args.threads)
+ids = list(srv.data.metrics)
+t0 = time.time()
+rslts = nr.readMany(ids, concurrency=args.threads)
+errs = [ r for r in rslts.values() if isinstance(r, Exception) ]
+print("readMany: {} metrics, {} errors, {:.1f} seconds, {} limiter waits, "
+      "server 429s {}".format(len(rslts), len(errs), time.time() - t0,
+                              nr.statistics['rateLimiterWaits'],
+                              srv.stats.get('429', 0)))
+if errs or srv.stats.get('429', 0):
+    print("FAILED: the limiter let requests through into a 429")
+    failed = True
+failed |= inflightCheck("readMany", nr._rateLimiter)
+srv.stop()
+
+#
+# cancelled async requests
+#
+async def cancelled(srv, ids):
+    async with numerous.AsyncNumerous(apiKey='nmrs_ratelimiter',
+                                      server=srv.serverURL,
+                                      rateLimiter=True) as anr:
+        m = anr.metric(ids[0])
+        await m.read()                  # so the limiter knows the window
+        ncancelled = 0
+        for i in range(5):
+            try:
+                await asyncio.wait_for(m.read(), 0.05)
+            except asyncio.TimeoutError:
+                ncancelled += 1
+        print("async: {} reads cancelled".format(ncancelled))
+        return anr._rateLimiter
+
+if numerous.aiohttp is None:
+    print("async: skipped (no aiohttp)")
+else:
+    srv = nrserver.NumerousStandIn(latency=0.3).start()
+    srv.populate(1)
+    limiter = asyncio.run(cancelled(srv, list(srv.data.metrics)))
+    failed |= inflightCheck("async", limiter)
+    srv.stop()
+
+#
+# hedged GETs, some of which stall
+#
+srv = nrserver.NumerousStandIn(latency=0.01, stallRate=0.1, stall=1).start()
+srv.populate(1)
+nr = numerous.Numerous(apiKey='nmrs_ratelimiter', server=srv.serverURL,
+                       rateLimiter=True, hedgePercentile=90)
+m = nr.metric(list(srv.data.metrics)[0])
+for i in range(150):
+    m.read()
+time.sleep(srv.stall + 0.5)             # for the losers to come back
+print("hedging: {} hedge requests, {} won".format(
+          nr.statistics['hedgeRequests'], nr.statistics['hedgeWins']))
+failed |= inflightCheck("hedging", nr._rateLimiter)
+srv.stop()
+
+print("FAILED" if failed else "OK")
@@ -16,6 +16,7 @@ import time
 #    -Y           : do NOT synchronize to top of API rate minute
 #    -D           : debug flag
 #    --capdelay   : force the volmaxdelay path (code coverage hack)
+#    --limiter    : use a NumerousRateLimiter instead of voluntary throttling
 #    --statistics : display statistics when done
 #
 # With no arguments at all this loops over a default number of API calls
@@ -37,6 +38,7 @@ parser.add_argument('-t', '--throttled', type=int, default=-1)
 parser.add_argument('-Y', '--nosync', action="store_true")
 parser.add_argument('-q', '--quiet', action="store_true")
 parser.add_argument('--capdelay', action="store_true")
+parser.add_argument('--limiter', action="store_true")
 parser.add_argument('--statistics', action="store_true")
 
 args = parser.parse_args()
@@ -51,7 +53,8 @@ def sync_to_top_of_api_rate(nr):
         time.sleep(nr.statistics['rate-reset'])
 
 
-nr = numerous.Numerous(apiKey=numerous.numerousKey(args.credspec))
+nr = numerous.Numerous(apiKey=numerous.numerousKey(args.credspec),
+                       rateLimiter=args.limiter)
 if args.statistics:
     nr.statistics['serverResponseTimes'] = [0] * 5 # keep extra response times
 
@@ -0,0 +1,135 @@
+#!/usr/bin/python3
+#
+# Tests NumerousSeries (and eventsArray/series, from the server and from a
+# NumerousEventStore) against a local stand-in server (nrserver.py).
+#
+# arguments:
+#    -e events    : number of events to write (default 300)
+#    -s seed      : random seed (default: a random one, which is printed)
+#
+# The events are written with random values and random "updated" times
+# over a day (some of them at exactly the same time, which is what rate()
+# has to cope with). Then:
+#
+#    - m.series(), store.series() and the events themselves have to agree
+#    - m.series(since=..., until=...) has to be the same as between()
+#    - diff, rate, resample (every "how", with and without fill) and
+#      rolling (every "how") are compared with straightforward python
+#      loops over the events
+#
+# Requires numpy; skipped (with OK) if there isn't any.
+#
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import numerous
+import nrserver
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-e', '--events', type=int, default=300)
+parser.add_argument('-s', '--seed', type=int)
+
+args = parser.parse_args()
+
+if numerous.numpy is None:
+    print("skipped (no numpy)")
+    print("OK")
+    sys.exit(0)
+numpy = numerous.numpy
+
+seed = args.seed if args.seed is not None else random.randrange(1000000)
+print("seed {}".format(seed))
+random.seed(seed)
+
+failed = False
+
+def check(what, got, expected):
+    ok = (len(got.updated) == len(expected[0]) and
+          numpy.allclose(got.updated, expected[0]) and
+          numpy.allclose(got.value, expected[1], equal_nan=True))
+    if not ok:
+        print("FAILED: {}".format(what))
+    return not ok
+
+srv = nrserver.NumerousStandIn(chunkSize=50, rate=1000000000).start()
+nr = numerous.Numerous(apiKey='nmrs_series', server=srv.serverURL)
+m = nr.createMetric('series-test', 0)
+
+# random times over the last day, to the millisecond, some of them twice
+t0 = math.floor(time.time()) - 86400
+times = [ t0 + random.randrange(86400000) / 1000.0
+          for i in range(args.events) ]
+times += random.sample(times, args.events // 20)
+for t in times:
+    m.write(random.randrange(100), updated=nrserver._timestamp(t))
+
+# the reference: (updated, value) oldest first, from the server's list
+with srv.data.lock:
+    evl = list(reversed(srv.data.events[m.id]))
+def seconds(ts):
+    return numpy.datetime64(ts.rstrip('Z'), 'ms').astype('int64') / 1000.0
+T = [ seconds(e['updated']) for e in evl ]
+V = [ float(e['value']) for e in evl ]
+
+s = m.series()
+print("{} events, series of {}".format(len(evl), len(s)))
+failed |= check("m.series()", s, (T, V))
+
+with tempfile.TemporaryDirectory() as tmpd:
+    store = numerous.NumerousEventStore(os.path.join(tmpd, 'events.db'))
+    store.sync(m)
+    failed |= check("store.series()", store.series(m), (T, V))
+    store.close()
+
+# since/until on the server side vs between()
+since, until = evl[len(evl)//4]['updated'], evl[3*len(evl)//4]['updated']
+b = s.between(seconds(since), seconds(until))
+failed |= check("series(since, until)", m.series(since=since, until=until),
+                (b.updated, b.value))
+
+failed |= check("diff", s.diff(),
+                (T[1:], [ V[i] - V[i-1] for i in range(1, len(V)) ]))
+failed |= check("rate", s.rate(),
+                (T[1:], [ (V[i] - V[i-1]) / (T[i] - T[i-1])
+                          if T[i] > T[i-1] else float('nan')
+                          for i in range(1, len(V)) ]))
+
+# resample: group by bucket with a dictionary
+def resampled(seconds, how, fill=None):
+    buckets = {}
+    for t, v in zip(T, V):
+        buckets.setdefault(math.floor(t / seconds), []).append(v)
+    f = { 'sum' : sum, 'mean' : lambda l: sum(l) / len(l), 'min' : min,
+          'max' : max, 'count' : len, 'first' : lambda l: l[0],
+          'last' : lambda l: l[-1] }[how]
+    keys = sorted(buckets)
+    if fill is not None:
+        keys = range(keys[0], keys[-1] + 1)
+    return ([ k * seconds for k in keys ],
+            [ f(buckets[k]) if k in buckets else fill for k in keys ])
+
+for how in numerous.NumerousSeries._resamplers:
+    failed |= check("resample(600, {!r})".format(how),
+                    s.resample(600, how), resampled(600, how))
+    failed |= check("resample(60, {!r}, fill=0)".format(how),
+                    s.resample(60, how, fill=0), resampled(60, how, 0))
+
+# rolling: for each point, the points in (t - seconds, t]
+def rolled(seconds, how):
+    r = []
+    for t in T:
+        w = [ v for u, v in zip(T, V) if t - seconds < u <= t ]
+        r.append({ 'sum' : sum(w), 'count' : len(w),
+                   'mean' : sum(w) / len(w) }[how])
+    return (T, r)
+
+for how in numerous.NumerousSeries._rollers:
+    failed |= check("rolling(1800, {!r})".format(how),
+                    s.rolling(1800, how), rolled(1800, how))
+
+srv.stop()
+print("FAILED" if failed else "OK")
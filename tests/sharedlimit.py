@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+#
+# Tests the NumerousSharedRateLimiter (Numerous(rateLimiter='shared'))
+# against a local stand-in server (nrserver.py).
+#
+# arguments:
+#    -p procs     : number of processes (default 6)
+#    -n amt       : reads per process (default 10)
+#    -r rate      : stand-in server rate allocation per window (default 20)
+#    -w window    : stand-in server rate window in seconds (default 3)
+#
+# Several processes read the same metric at the same time, each with its
+# own Numerous but all using one limiter state file. Together they do more
+# reads than the rate allocation and the server must never return a 429
+# (with a NumerousRateLimiter per process they would each find out about
+# the others too late).
+#
+# Then the checks on the state file itself: the default one (from the API
+# key) has to be in a directory only we can use, and a state file that is
+# a symlink has to be refused.
+#
+import argparse
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+import numerous
+import nrserver
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-p', '--procs', type=int, default=6)
+parser.add_argument('-n', '--nreads', type=int, default=10)
+parser.add_argument('-r', '--rate', type=int, default=20)
+parser.add_argument('-w', '--window', type=int, default=3)
+
+args = parser.parse_args()
+failed = False
+
+# what each process runs; prints its 429 and limiter wait counts
+child = r'''
+import sys, numerous
+nr = numerous.Numerous(apiKey='nmrs_sharedlimit', server=sys.argv[1],
+            rateLimiter=numerous.NumerousSharedRateLimiter(path=sys.argv[2]))
+m = nr.metric(sys.argv[3])
+for i in range(int(sys.argv[4])):
+    m.read()
+print(nr.statistics['throttle429'], nr.statistics['rateLimiterWaits'])
+'''
+
+srv = nrserver.NumerousStandIn(rate=args.rate, window=args.window).start()
+srv.populate(1)
+mId = list(srv.data.metrics)[0]
+
+env = dict(os.environ)
+env['PYTHONPATH'] = os.pathsep.join(
+    [ os.path.dirname(os.path.abspath(numerous.__file__)) ] +
+    [ p for p in [ env.get('PYTHONPATH') ] if p ])
+
+with tempfile.TemporaryDirectory() as tmpd:
+    path = os.path.join(tmpd, 'rate-state')
+    t0 = time.time()
+    procs = [ subprocess.Popen([ sys.executable, '-c', child, srv.serverURL,
+                                 path, mId, str(args.nreads) ],
+                               stdout=subprocess.PIPE, env=env,
+                               universal_newlines=True)
+              for i in range(args.procs) ]
+    outs = [ p.communicate()[0].split() for p in procs ]
+
+print("{} processes, {} reads each, {:.1f} seconds: limiter waits {}, "
+      "server 429s {}".format(args.procs, args.nreads, time.time() - t0,
+                              [ o[1] if o else '?' for o in outs ],
+                              srv.stats.get('429', 0)))
+if any(p.returncode != 0 for p in procs):
+    print("FAILED: a process failed")
+    failed = True
+if srv.stats.get('429', 0):
+    print("FAILED: the shared limiter let requests through into a 429")
+    failed = True
+srv.stop()
+
+#
+# the state file
+#
+lim = numerous.NumerousSharedRateLimiter(apiKey='nmrs_sharedlimit')
+st = os.lstat(os.path.dirname(lim.path))
+print("default state file: {}".format(lim.path))
+if (not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or
+        st.st_mode & 0o077):
+    print("FAILED: the default state file isn't in a private directory")
+    failed = True
+
+with tempfile.TemporaryDirectory() as tmpd:
+    target = os.path.join(tmpd, 'someone-elses')
+    link = os.path.join(tmpd, 'rate-state')
+    os.symlink(target, link)
+    try:
+        numerous.NumerousSharedRateLimiter(path=link)
+        print("FAILED: a symlinked state file was used")
+        failed = True
+    except OSError as e:
+        print("symlinked state file refused: {}".format(e))
+
+print("FAILED" if failed else "OK")
@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+#
+# Compares the per-request client overhead of the Numerous transports
+# (see NumerousRequestsTransport and NumerousUrllib3Transport).
+#
+# wiki/To-Do.md has a note about 4-6 milliseconds of overhead buried in
+# the requests module; this measures how much of that goes away by going
+# straight to urllib3.
+#
+# arguments:
+#    -n amt       : number of reads per transport (default 2000)
+#    -r rounds    : alternate the transports this many times (default 3)
+#    -s server    : use this server (full URL) instead of a local stand-in
+#    -c credspec  : the usual (only used with -s)
+#    -m metric    : metric ID to read (only used with -s; default: make one)
+#
+# By default a NumerousStandIn (nrserver.py) is started in this process
+# with no rate limit and no latency. The CPU time reported is the client
+# thread's own (time.thread_time) so the stand-in server's threads don't
+# count; the wall time does include the server though.
+#
+# Against the real server each read uses up one of your API allocation
+# and most of the time is the network, so the wall times say little;
+# the CPU times are still meaningful.
+#
+import argparse
+import time
+import numerous
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-n', '--ncalls', type=int, default=2000)
+parser.add_argument('-r', '--rounds', type=int, default=3)
+parser.add_argument('-s', '--server')
+parser.add_argument('-c', '--credspec')
+parser.add_argument('-m', '--metric')
+
+args = parser.parse_args()
+
+srv = None
+if args.server:
+    server = args.server
+    apiKey = numerous.numerousKey(args.credspec)
+else:
+    import nrserver
+    srv = nrserver.NumerousStandIn(rate=1000000000).start()
+    server = srv.serverURL
+    apiKey = 'nmrs_transportbench'
+
+transports = [ 'requests', 'urllib3' ]
+nrs = { t : numerous.Numerous(apiKey=apiKey, server=server, transport=t)
+        for t in transports }
+
+metricId = args.metric
+deleteIt = False
+if not metricId:
+    m = nrs['requests'].createMetric('transportbench-temp-metric', 0,
+                                     attrs={ 'private' : True })
+    metricId = m.id
+    deleteIt = True
+
+cpu = { t : 0.0 for t in transports }
+wall = { t : 0.0 for t in transports }
+
+for t in transports:            # warm up (connections, etc)
+    nrs[t].metric(metricId).read()
+
+for r in range(args.rounds):
+    for t in transports:
+        m = nrs[t].metric(metricId)
+        c0 = time.thread_time()
+        w0 = time.time()
+        for i in range(args.ncalls):
+            m.read()
+        cpu[t] += time.thread_time() - c0
+        wall[t] += time.time() - w0
+
+n = args.ncalls * args.rounds
+print("{:>10s} {:>14s} {:>14s}".format("transport", "cpu ms/call", "wall ms/call"))
+for t in transports:
+    print("{:>10s} {:>14.3f} {:>14.3f}".format(t, 1000*cpu[t]/n,
+                                               1000*wall[t]/n))
+
+if deleteIt:
+    nrs['requests'].metric(metricId).crushKillDestroy()
+
+if srv:
+    srv.stop()